@@ -1,19 +1,37 @@
 from .core.agent import Agent
 from .core.tool_base import BaseTool, ToolParameter
-from .core.client import AIClient, G4FClient
+from .core.tool_registry import ToolRegistry
+from .core.client import AIClient, G4FClient, ClientMiddleware, Priority, request_context
+from .core.caching_client import CachingClient
+from .core.coalescing_client import CoalescingClient
+from .core.scheduling_client import SchedulingClient
+from .core.pooled_client import PooledClient
+from .core.openai_client import OpenAIClient
 from .core.message_storage import MessageStorage, Message
-from .database.db import db, with_session
+from .core.agent_pool import AgentPool
+from .database.db import db, with_session, with_async_session
 
 __version__ = "0.1.0"
 
 __all__ = [
     "Agent",
+    "AgentPool",
     "BaseTool",
     "ToolParameter",
+    "ToolRegistry",
     "AIClient",
     "G4FClient",
+    "OpenAIClient",
+    "ClientMiddleware",
+    "CachingClient",
+    "CoalescingClient",
+    "SchedulingClient",
+    "PooledClient",
+    "Priority",
+    "request_context",
     "MessageStorage",
     "Message",
     "db",
-    "with_session"
+    "with_session",
+    "with_async_session"
 ] 
\ No newline at end of file
@@ -1,12 +1,20 @@
 # Standard library imports
+import asyncio
+import functools
 import json
 import logging
-from typing import Dict, List, Type, Any, Union
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type, Any, Union
 
 # Local imports
-from .client import AIClient
+from .client import AIClient, Priority, current_request_agent_id, current_request_priority, request_context
+from .decision_parser import ACTION_EVENT, DecisionStreamParser
 from .message_storage import MessageStorage 
-from .tool_base import BaseTool
+from .tool_base import BaseTool, current_agent
+from .tool_registry import ToolRegistry
+
+# Answer of a run that did not finish within max_iterations
+MAX_ITERATIONS_ANSWER = "Maximum number of iterations exceeded"
 
 # System prompt template
 SYSTEM_PROMPT_TEMPLATE = """Always respond in User language!
@@ -32,28 +40,104 @@ Do not respond with both actions and final_answer at the same time!
 If there are no more actions, do not add actions
 """
 
+
+@functools.lru_cache(maxsize=256)
+def _render_system_prompt(who_am_i: str, tools_description: str) -> str:
+    # Agents with the same prompt and tools share one rendered string
+    return SYSTEM_PROMPT_TEMPLATE.format(who_am_i=who_am_i, tools_description=tools_description)
+
+
+class _ActionDispatcher:
+    """
+    Schedules the tool calls of one turn as soon as they are known.
+    
+    Independent calls run concurrently under the agent's max_parallel_tools
+    cap, order-sensitive calls wait for every earlier call and block later ones.
+    If a call fails, the calls after it in the chain are not executed.
+    """
+
+    def __init__(self, agent: "Agent"):
+        self.agent = agent
+        self.calls: List[Tuple[Dict, asyncio.Task]] = []
+        self._barrier: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(max(1, agent.max_parallel_tools))
+
+    def submit(self, tool_call: Dict) -> None:
+        """Starts a tool call in the background."""
+        if self.agent.max_parallel_tools > 1 and self.agent._is_independent(tool_call):
+            task = asyncio.create_task(self._run_independent(tool_call, self._barrier))
+        else:
+            previous = [task for _, task in self.calls]
+            task = asyncio.create_task(self._run_exclusive(tool_call, previous))
+            self._barrier = task
+        self.calls.append((tool_call, task))
+
+    async def _run_independent(self, tool_call: Dict, barrier: Optional[asyncio.Task]) -> Any:
+        if barrier is not None:
+            await barrier
+        async with self._semaphore:
+            return await self.agent._call_tool(tool_call)
+
+    async def _run_exclusive(self, tool_call: Dict, previous: List[asyncio.Task]) -> Any:
+        for task in previous:
+            await task
+        return await self.agent._call_tool(tool_call)
+
+    async def collect(self) -> None:
+        """Waits for all calls and stores their results in action order."""
+        for index, (tool_call, task) in enumerate(self.calls):
+            try:
+                result = await task
+            except BaseException:
+                self.calls = self.calls[index + 1:]
+                await self.cancel()
+                raise
+            self.agent._add_tool_result(tool_call, result)
+        self.calls = []
+
+    async def cancel(self) -> None:
+        """Cancels calls that are still running."""
+        tasks = [task for _, task in self.calls]
+        self.calls = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class Agent:
     def __init__(
         self,
         agent_id: str,
         client: AIClient,
         message_storage: MessageStorage = None,
-        tools: Dict[str, BaseTool] = None,
+        tools: Union[Iterable[BaseTool], ToolRegistry] = None,
         who_am_i: str = "You are an AI assistant",
         max_iterations: int = 20,
+        max_parallel_tools: int = 4,
+        stream: bool = False,
     ):
         self.who_am_i = who_am_i
-        self.tools: Dict[str, BaseTool] = {}
         self.client = client
-        self.message_storage = message_storage or MessageStorage(max_size=20)
+        self.message_storage = message_storage if message_storage is not None else MessageStorage(max_size=20)
         self.max_iterations = max_iterations
+        self.max_parallel_tools = max_parallel_tools
+        self.stream = stream
         self.agent_id = agent_id
 
-        self.update_system_prompt(self._create_system_prompt())
+        if isinstance(tools, ToolRegistry):
+            # Shared registry: copied before this agent registers more tools
+            self.tools = tools
+            self._tools_shared = True
+            for tool in tools.values():
+                # Tools already registered elsewhere find the running agent via get_parent_agent
+                if tool.parent_agent is None:
+                    tool._register_internal(self)
+        else:
+            self.tools = ToolRegistry()
+            self._tools_shared = False  # set when the registry is shared with spawned agents
+            self._register_tools(tools or [])
 
-        if tools:
-            for tool in tools:
-                self.register_tool(tool)
+        self.update_system_prompt(self._create_system_prompt())
 
     def get_id(self) -> str:
         """Returns the agent's ID."""
@@ -63,14 +147,74 @@ class Agent:
         """Sets the agent's ID."""
         self.agent_id = new_id
 
+    def spawn(
+        self,
+        agent_id: str = None,
+        client: AIClient = None,
+        who_am_i: str = None,
+        message_storage: MessageStorage = None
+    ) -> "Agent":
+        """
+        Creates a lightweight copy of the agent with its own message history.
+
+        The copy shares tools (copy-on-write) and, unless who_am_i changes, the
+        rendered system prompt, so spawning is cheap. Spawned agents do not
+        share messages and may run concurrently.
+
+        Args:
+            agent_id: ID of the copy, defaults to the agent's ID
+            client: LLM client of the copy, defaults to the agent's client
+            who_am_i: who am i prompt of the copy, defaults to the agent's one
+            message_storage: message storage of the copy, defaults to an empty
+                one with the limits of the agent's storage
+        """
+        agent = type(self).__new__(type(self))
+        agent.__dict__.update(self.__dict__)
+        self._tools_shared = agent._tools_shared = True
+
+        if agent_id is not None:
+            agent.agent_id = agent_id
+        if client is not None:
+            agent.client = client
+
+        if who_am_i is not None and who_am_i != self.who_am_i:
+            agent.who_am_i = who_am_i
+            system_prompt = agent._create_system_prompt()
+        else:
+            system_prompt = self.message_storage.system_prompt
+
+        if message_storage is None:
+            message_storage = MessageStorage(
+                max_size=self.message_storage.max_size,
+                max_tokens=self.message_storage.max_tokens,
+                tokenizer=self.message_storage.tokenizer
+            )
+        message_storage.update_system_prompt(system_prompt)
+        agent.message_storage = message_storage
+        return agent
+
     def register_tool(self, tool: BaseTool) -> None:
         """Registers a new tool."""
-        self.tools[tool.name] = tool
-        tool._register_internal(self)
+        self.register_tools([tool])
+
+    def register_tools(self, tools: Iterable[BaseTool]) -> None:
+        """Registers several tools, rendering the system prompt once."""
+        self._register_tools(tools)
         self.update_system_prompt(self._create_system_prompt())
 
+    def _register_tools(self, tools: Iterable[BaseTool]) -> None:
+        tools = list(tools)
+        if self._tools_shared:
+            self.tools = self.tools.copy()
+            self._tools_shared = False
+        self.tools.register_all(tools)
+        for tool in tools:
+            tool._register_internal(self)
+
     def update_who_am_i(self, new_prompt: str) -> None:
         """Updates who am i prompt and reinitializes the agent"""
+        if new_prompt == self.who_am_i:
+            return
         self.who_am_i = new_prompt
         self.update_system_prompt(self._create_system_prompt())
 
@@ -84,11 +228,7 @@ class Agent:
 
     def _create_all_tools_description(self) -> str:
         """Creates a description of available tools for the prompt."""
-        tools_desc = []
-        for tool in self.tools.values():
-            tool_info = tool.to_string()
-            tools_desc.append(tool_info)
-        return "\n".join(tools_desc)
+        return self.tools.description()
     
     def clear_memory(self) -> None:
         """Clears the agent's memory."""
@@ -102,33 +242,79 @@ class Agent:
         
     def _create_system_prompt(self) -> str:
         """Creates system prompt with tools description."""
-        return SYSTEM_PROMPT_TEMPLATE.format(
-            who_am_i=self.who_am_i,
-            tools_description=self._create_all_tools_description()
-        )
+        return _render_system_prompt(self.who_am_i, self._create_all_tools_description())
         
-    async def _execute_tool_call(self, tool_call: Dict) -> Any:
-        """Executes a single tool call."""
+    async def _call_tool(self, tool_call: Dict) -> Any:
+        """Executes a single tool call without storing its result."""
         tool_name, tool_params = next(iter(tool_call.items()))
         
         if tool_name not in self.tools:
             raise ValueError(f"Tool {tool_name} not found")
             
         tool = self.tools[tool_name]
-        result = await tool.execute(**tool_params)
+        return await tool.invoke(**tool_params)
+
+    def _add_tool_result(self, tool_call: Dict, result: Any) -> None:
+        """Stores the result of a tool call in the message storage."""
+        tool_name = next(iter(tool_call))
         self.message_storage.add_message("user", {
             "tool": tool_name,
             "result": result
         })
+
+    def _is_independent(self, tool_call: Dict) -> bool:
+        """Checks if a tool call may run concurrently with its neighbours."""
+        tool = self.tools.get(next(iter(tool_call), None))
+        return tool is not None and not tool.order_sensitive
+        
+    async def _execute_tool_call(self, tool_call: Dict) -> Any:
+        """Executes a single tool call."""
+        result = await self._call_tool(tool_call)
+        self._add_tool_result(tool_call, result)
         return result
+
+    async def _execute_actions(self, actions: List[Dict]) -> None:
+        """
+        Executes all tool calls of one turn.
+        
+        Consecutive independent calls run concurrently, at most max_parallel_tools
+        at a time, while order-sensitive calls run alone. Results are stored
+        in the original action order.
+        """
+        dispatcher = _ActionDispatcher(self)
+        for tool_call in actions:
+            dispatcher.submit(tool_call)
+        await dispatcher.collect()
         
+    @contextmanager
+    def _request_scope(self):
+        """Marks LLM requests made by this agent for scheduling clients."""
+        inherited = current_request_priority(default=None)
+        if current_request_agent_id() is None:
+            # Top-level turn of a user
+            priority = Priority.INTERACTIVE if inherited is None else inherited
+        else:
+            # Sub-agent loop, never ahead of top-level turns
+            priority = max(Priority.NORMAL if inherited is None else inherited, Priority.NORMAL)
+        token = current_agent.set(self)
+        try:
+            with request_context(priority=priority, agent_id=self.agent_id):
+                yield
+        finally:
+            current_agent.reset(token)
+
     async def run(self, user_input: str = None) -> str:
         """Launches agent with given request."""
-        
+        if self.stream:
+            return "".join([chunk async for chunk in self.run_stream(user_input)])
+        with self._request_scope():
+            return await self._run(user_input)
+
+    async def _run(self, user_input: str = None) -> str:
         iteration_count = 0
         while True:
             if iteration_count >= self.max_iterations:
-                return "Maximum number of iterations exceeded"
+                return MAX_ITERATIONS_ANSWER
             iteration_count += 1
             
             # Add user input only once at the beginning of iteration
@@ -154,8 +340,7 @@ class Agent:
                         return decision['final_answer']
                     
                     if "actions" in decision:
-                        for tool_call in decision["actions"]:
-                            await self._execute_tool_call(tool_call)
+                        await self._execute_actions(decision["actions"])
                         user_input = None
                         continue
                         
@@ -166,4 +351,76 @@ class Agent:
             except Exception as e:
                 logging.error(f"Error: {str(e)}")
                 self.message_storage.add_message("user", f"Error: {str(e)}")
-                raise e 
\ No newline at end of file
+                raise e
+
+    async def run_stream(self, user_input: str = None) -> AsyncIterator[str]:
+        """
+        Launches agent with given request and streams the final answer.
+        
+        Tool calls are started as soon as their JSON object is complete in the
+        model output, while the rest of the answer is still being generated.
+        """
+        iteration_count = 0
+        while True:
+            if iteration_count >= self.max_iterations:
+                yield MAX_ITERATIONS_ANSWER
+                return
+            iteration_count += 1
+
+            # Add user input only once at the beginning of iteration
+            if user_input is not None:
+                self.message_storage.add_message("user", user_input)
+
+            messages = self.message_storage.get_messages_as_dict()
+            parser = DecisionStreamParser()
+            dispatcher = _ActionDispatcher(self)
+            stream = self.client.generate_stream(messages)
+            try:
+                while True:
+                    # Scoped per chunk, so the request context does not leak to the consumer
+                    with self._request_scope():
+                        try:
+                            chunk = await stream.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        events = parser.feed(chunk)
+                        for kind, value in events:
+                            if kind == ACTION_EVENT:
+                                dispatcher.submit(value)
+                    for kind, value in events:
+                        if kind != ACTION_EVENT:
+                            yield value
+
+                response_text = parser.text
+                if response_text:
+                    self.message_storage.add_message("assistant", response_text)
+
+                if not parser.is_plain_text and response_text.strip():
+                    try:
+                        decision = json.loads(response_text.strip().strip('"'))
+                    except json.JSONDecodeError:
+                        await dispatcher.cancel()
+                        self.message_storage.add_message("user", f"ERROR: Bad answer from AI Model: {response_text}")
+                        yield f"Error: bad answer from model: {response_text}"
+                        return
+                else:
+                    decision = {"final_answer": response_text}
+
+                await dispatcher.collect()
+
+                if "final_answer" in decision:
+                    if not parser.answer_streamed and decision["final_answer"]:
+                        yield str(decision["final_answer"])
+                    return
+
+                if "actions" in decision:
+                    user_input = None
+                    continue
+
+            except Exception as e:
+                logging.error(f"Error: {str(e)}")
+                self.message_storage.add_message("user", f"Error: {str(e)}")
+                raise e
+            finally:
+                await dispatcher.cancel()
+                await stream.aclose()
@@ -0,0 +1,224 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+# Local imports
+from .agent import Agent
+from .message_storage import MessageStorage
+from .singleflight import SingleFlight
+from ..database.db import db
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("agent", "refs", "last_used", "size", "lock")
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.size = 0
+        # Held while the agent is in use or saved: runs of one agent share its
+        # message storage, so they must not interleave with each other or a save
+        self.lock = asyncio.Lock()
+
+
+def history_size(agent: Agent) -> int:
+    """Approximate memory held by an agent: characters of its message history."""
+    return agent.message_storage.history_chars
+
+
+class AgentPool:
+    """
+    Agents of many users in one process, created on first use.
+
+    Agents are kept in an LRU bounded by count and by the size of their
+    message history. Agents that are not in use are evicted when a limit is
+    exceeded or after idle_timeout seconds without use; their messages are
+    saved first and loaded again when the agent is next acquired. Loads and
+    saves go through async database sessions, so they do not block other
+    agents when the async engine is available.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str, MessageStorage], Agent],
+        storage_factory: Callable[[], MessageStorage] = MessageStorage,
+        max_agents: int = 1000,
+        max_history_chars: Optional[int] = None,
+        idle_timeout: Optional[float] = 600.0,
+        persist: bool = True,
+    ):
+        """
+        Args:
+            factory: creates the agent of an agent id with the given (loaded) message storage
+            storage_factory: creates an empty message storage
+            max_agents: max number of agents kept in memory
+            max_history_chars: max total characters of message history kept in memory (None - no limit)
+            idle_timeout: seconds after which an unused agent is evicted (None - only evicted by the limits)
+            persist: save messages to the database on eviction and load them on creation
+        """
+        self.factory = factory
+        self.storage_factory = storage_factory
+        self.max_agents = max_agents
+        self.max_history_chars = max_history_chars
+        self.idle_timeout = idle_timeout
+        self.persist = persist
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loads = SingleFlight()
+        self._history_chars = 0
+        self._sweeper: Optional[asyncio.Task] = None
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "agents": len(self._entries),
+            "in_use": sum(1 for entry in self._entries.values() if entry.refs),
+            "history_chars": self._history_chars,
+            "created": self.created,
+            "evicted": self.evicted
+        }
+
+    @asynccontextmanager
+    async def acquire(self, agent_id: str) -> AsyncIterator[Agent]:
+        """
+        Yields the agent of agent_id, creating or loading it if needed.
+
+        Use of one agent is exclusive: concurrent acquirers of an id wait for
+        each other. The agent is not evicted while in use or awaited.
+        """
+        entry = await self._get_entry(agent_id)
+        entry.refs += 1
+        try:
+            async with entry.lock:
+                yield entry.agent
+        finally:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if self._entries.get(agent_id) is entry:
+                size = history_size(entry.agent)
+                self._history_chars += size - entry.size
+                entry.size = size
+            await self._enforce_limits()
+
+    async def _get_entry(self, agent_id: str) -> _Entry:
+        # Loops because the loaded agent may be evicted before this caller resumes
+        while True:
+            entry = self._entries.get(agent_id)
+            if entry is not None:
+                self._entries.move_to_end(agent_id)
+                return entry
+            # Concurrent acquires of one id share the load and so the agent
+            await self._loads.do(agent_id, lambda: self._load(agent_id))
+
+    async def _load(self, agent_id: str) -> None:
+        storage = self.storage_factory()
+        if self.persist:
+            async with db.get_async_session() as session:
+                await session.run_sync(lambda sync_session: storage.load_from_db(agent_id, sync_session))
+        entry = _Entry(self.factory(agent_id, storage))
+        entry.size = history_size(entry.agent)
+        self._history_chars += entry.size
+        self._entries[agent_id] = entry
+        self.created += 1
+
+    async def save(self, agent_id: str) -> None:
+        """Saves messages of an agent added since its previous save, once it is not in use."""
+        entry = self._entries.get(agent_id)
+        if entry is not None and self.persist:
+            await self._save(agent_id, entry)
+
+    @staticmethod
+    async def _save(agent_id: str, entry: _Entry) -> None:
+        storage = entry.agent.message_storage
+        async with entry.lock:
+            async with db.get_async_session() as session:
+                await session.run_sync(lambda sync_session: storage.save_to_db(agent_id, sync_session))
+
+    async def evict(self, agent_id: str) -> bool:
+        """Saves and drops an agent that is not in use; returns False if it is in use or fails to save."""
+        entry = self._entries.get(agent_id)
+        if entry is None or entry.refs:
+            return False
+        if self.persist:
+            try:
+                await self._save(agent_id, entry)
+            except Exception as e:
+                # Kept in memory, so its unsaved messages are not lost
+                logger.error(f"Failed to save agent {agent_id} before eviction: {e}")
+                return False
+            # Acquired or evicted by someone else while saving
+            if entry.refs or self._entries.get(agent_id) is not entry:
+                return False
+        del self._entries[agent_id]
+        self._history_chars -= entry.size
+        self.evicted += 1
+        return True
+
+    def _over_limits(self) -> bool:
+        if len(self._entries) > self.max_agents:
+            return True
+        return self.max_history_chars is not None and self._history_chars > self.max_history_chars
+
+    async def _enforce_limits(self) -> None:
+        """Evicts least recently used agents that are not in use while a limit is exceeded."""
+        if not self._over_limits():
+            return
+        for agent_id in list(self._entries):
+            if not self._over_limits():
+                break
+            await self.evict(agent_id)
+
+    async def evict_idle(self) -> int:
+        """Evicts agents unused for idle_timeout seconds; returns their number."""
+        if self.idle_timeout is None:
+            return 0
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [
+            agent_id for agent_id, entry in self._entries.items()
+            if not entry.refs and entry.last_used <= deadline
+        ]
+        evicted = 0
+        for agent_id in idle:
+            evicted += await self.evict(agent_id)
+        return evicted
+
+    def start(self, interval: float = 60.0) -> None:
+        """Starts evicting idle agents every interval seconds."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep(interval))
+
+    async def _sweep(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.info(f"Evicted {evicted} idle agents")
+            except Exception as e:
+                logger.error(f"Error evicting idle agents: {e}")
+
+    async def close(self) -> None:
+        """Stops the idle sweeper and saves all agents."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        for agent_id in list(self._entries):
+            await self.save(agent_id)
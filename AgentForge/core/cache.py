@@ -0,0 +1,61 @@
+# Standard library imports
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """In-memory LRU cache with entry limit, optional TTL and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: max number of entries, the least recently used are evicted
+            ttl: lifetime of an entry in seconds (None - no expiration)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: tuple) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns a cached value and marks it as recently used."""
+        entry = self._data.get(key)
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value; ttl overrides the cache TTL for this entry."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,157 @@
+# Standard library imports
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+# Local imports
+from .cache import LRUCache
+from .client import AIClient, ClientMiddleware, request_key
+
+logger = logging.getLogger(__name__)
+
+
+class DiskResponseCache:
+    """SQLite-backed response cache that survives restarts."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        """
+        Args:
+            path: path of the SQLite file
+            ttl: lifetime of an entry in seconds (None - no expiration)
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        self.prune()
+
+    def _get(self, key: str) -> Optional[str]:
+        query = "SELECT value FROM responses WHERE key = ?"
+        params = [key]
+        if self.ttl is not None:
+            query += " AND created_at >= ?"
+            params.append(time.time() - self.ttl)
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    def prune(self) -> None:
+        """Deletes expired entries."""
+        if self.ttl is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CachingClient(ClientMiddleware):
+    """
+    Client that answers repeated requests from a cache.
+
+    Requests are keyed by a stable hash of (model, messages). Answers are kept
+    in an in-memory LRU and, optionally, in a SQLite file.
+    """
+
+    def __init__(
+        self,
+        client: AIClient,
+        max_size: int = 1024,
+        ttl: Optional[float] = 3600,
+        disk_path: Optional[str] = None,
+        disk_ttl: Optional[float] = None,
+    ):
+        """
+        Args:
+            client: client that generates answers on cache misses
+            max_size: max number of answers kept in memory
+            ttl: lifetime of an answer in memory, in seconds
+            disk_path: SQLite file for the persistent tier (None - memory only)
+            disk_ttl: lifetime of an answer on disk, defaults to ttl
+        """
+        super().__init__(client)
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.disk = DiskResponseCache(disk_path, ttl=disk_ttl if disk_ttl is not None else ttl) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self.memory)
+        }
+
+    async def _lookup(self, key: str) -> Optional[str]:
+        answer = self.memory.get(key)
+        if answer is not None:
+            self.hits += 1
+            return answer
+
+        if self.disk is not None:
+            answer = await self.disk.get(key)
+            if answer is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, answer)
+                return answer
+
+        self.misses += 1
+        return None
+
+    async def _store(self, key: str, answer: str) -> None:
+        if not answer:
+            return
+        self.memory.set(key, answer)
+        if self.disk is not None:
+            try:
+                await self.disk.set(key, answer)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write response cache: {e}")
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        key = request_key(self.model, messages)
+        answer = await self._lookup(key)
+        if answer is None:
+            answer = await self.inner.generate_message(messages)
+            await self._store(key, answer)
+        return answer
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        key = request_key(self.model, messages)
+        answer = await self._lookup(key)
+        if answer is not None:
+            yield answer
+            return
+
+        chunks = []
+        async for chunk in self.inner.generate_stream(messages):
+            chunks.append(chunk)
+            yield chunk
+        # Only complete answers are cached
+        await self._store(key, "".join(chunks))
@@ -1,4 +1,47 @@
-from typing import List, Dict, Any, Optional
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import List, Dict, Any, Iterator, Optional, AsyncIterator
+
+
+class Priority(IntEnum):
+    """Priority classes of LLM requests, lower values go first."""
+    INTERACTIVE = 0  # top-level Agent.run turns
+    NORMAL = 1       # sub-agent loops
+    BACKGROUND = 2   # summarization and other background work
+
+
+_request_priority: ContextVar[Optional[Priority]] = ContextVar("request_priority", default=None)
+_request_agent_id: ContextVar[Optional[str]] = ContextVar("request_agent_id", default=None)
+
+
+@contextmanager
+def request_context(priority: Optional[Priority] = None, agent_id: Optional[str] = None) -> Iterator[None]:
+    """Sets priority and agent of the LLM requests made inside the block."""
+    tokens = []
+    if priority is not None:
+        tokens.append((_request_priority, _request_priority.set(priority)))
+    if agent_id is not None:
+        tokens.append((_request_agent_id, _request_agent_id.set(agent_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_request_priority(default: Optional[Priority] = Priority.NORMAL) -> Optional[Priority]:
+    """Returns the priority of LLM requests made in the current context."""
+    priority = _request_priority.get()
+    return default if priority is None else priority
+
+
+def current_request_agent_id() -> Optional[str]:
+    """Returns the id of the agent making LLM requests in the current context."""
+    return _request_agent_id.get()
+
 
 class AIClient:
     """Base class for working with LLM."""
@@ -19,6 +62,41 @@ class AIClient:
         """
         raise NotImplementedError("Subclasses must implement generate_message")
 
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """
+        Generates an answer from the model and yields it chunk by chunk.
+        
+        Clients without streaming support yield the whole answer at once.
+        
+        Args:
+            messages: List of messages in the format [{"role": "...", "content": "..."}]
+            
+        Yields:
+            str: Next piece of the model answer
+        """
+        yield await self.generate_message(messages)
+
+
+def request_key(model: Optional[str], messages: List[Dict[str, str]]) -> str:
+    """Stable hash of a generation request."""
+    payload = json.dumps([model, messages], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ClientMiddleware(AIClient):
+    """Base class for clients that wrap another client and add behaviour to it."""
+
+    def __init__(self, client: AIClient):
+        super().__init__(client.model, client.provider)
+        self.inner = client
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        return await self.inner.generate_message(messages)
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        async for chunk in self.inner.generate_stream(messages):
+            yield chunk
+
 
 class G4FClient(AIClient):
     """Client for working with g4f."""
@@ -33,4 +111,17 @@ class G4FClient(AIClient):
             model=self.model,
             messages=messages
         )
-        return response.choices[0].message.content 
\ No newline at end of file
+        return response.choices[0].message.content
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True
+        )
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
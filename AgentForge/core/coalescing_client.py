@@ -0,0 +1,30 @@
+# Standard library imports
+from typing import Dict, List
+
+# Local imports
+from .client import AIClient, ClientMiddleware, request_key
+from .singleflight import SingleFlight
+
+
+class CoalescingClient(ClientMiddleware):
+    """
+    Client that merges identical concurrent requests into one provider call.
+
+    Requests are keyed by a stable hash of (model, messages). Streams are
+    passed through as is, since every caller needs its own chunks.
+    """
+
+    def __init__(self, client: AIClient):
+        super().__init__(client)
+        self._flights = SingleFlight()
+
+    @property
+    def coalesced(self) -> int:
+        """Number of requests served by a call that was already in flight."""
+        return self._flights.shared
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        key = request_key(self.model, messages)
+        # The caller may reuse its message list, so the shared call gets a copy
+        snapshot = [dict(message) for message in messages]
+        return await self._flights.do(key, lambda: self.inner.generate_message(snapshot))
@@ -0,0 +1,148 @@
+# Standard library imports
+import json
+from typing import Any, List, Optional, Tuple
+
+# Event kinds produced by DecisionStreamParser.feed
+ACTION_EVENT = "action"
+TEXT_EVENT = "text"
+
+
+class DecisionStreamParser:
+    """
+    Incremental parser for an agent decision streamed chunk by chunk.
+
+    The model answers either with a JSON object ({"actions": [...]} or
+    {"final_answer": "..."}) or with plain text. feed() returns events as soon
+    as they can be recognised:
+        ("action", dict) - an entry of "actions" whose object has just closed
+        ("text", str)    - next piece of final_answer or of a plain-text answer
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.answer_streamed = False
+        self._mode: Optional[str] = None  # "json" or "text"
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._after_colon = False
+        self._action_start: Optional[int] = None
+        self._answer_pos: Optional[int] = None
+
+    @property
+    def is_plain_text(self) -> bool:
+        """True if the answer is not a JSON object."""
+        return self._mode == "text"
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Adds the next chunk of the answer and returns recognised events."""
+        self.text += chunk
+        events: List[Tuple[str, Any]] = []
+
+        if self._mode is None:
+            stripped = self.text.lstrip()
+            if not stripped:
+                return events
+            if stripped.startswith("{"):
+                self._mode = "json"
+            else:
+                self._mode = "text"
+                chunk = self.text
+
+        if self._mode == "text":
+            if chunk:
+                self.answer_streamed = True
+                events.append((TEXT_EVENT, chunk))
+            return events
+
+        self._scan(events)
+        return events
+
+    def _scan(self, events: List[Tuple[str, Any]]) -> None:
+        text = self.text
+        length = len(text)
+        i = self._pos
+
+        while i < length:
+            char = text[i]
+
+            if self._in_string:
+                if char == "\\":
+                    # Only stop at complete escape sequences, so that
+                    # final_answer pieces can always be decoded
+                    size = 2
+                    if i + 1 < length and text[i + 1] == "u":
+                        size = 6
+                        if i + 3 < length and text[i + 2] in "dD" and text[i + 3] in "89abAB":
+                            size = 12  # surrogate pair
+                    if i + size > length:
+                        break
+                    i += size
+                    continue
+                if char == '"':
+                    self._in_string = False
+                    if self._answer_pos is not None:
+                        self._emit_answer(events, i)
+                        self._answer_pos = None
+                    elif self._depth == 1:
+                        self._last_string = text[self._string_start:i + 1]
+                i += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._depth == 1 and self._after_colon and self._key == "final_answer":
+                    self._answer_pos = i + 1
+                self._after_colon = False
+            elif char in "{[":
+                self._depth += 1
+                self._after_colon = False
+                if char == "{" and self._depth == 3 and self._key == "actions":
+                    self._action_start = i
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._action_start is not None:
+                    try:
+                        action = json.loads(text[self._action_start:i + 1])
+                        if isinstance(action, dict) and action:
+                            events.append((ACTION_EVENT, action))
+                    except json.JSONDecodeError:
+                        pass
+                    self._action_start = None
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._key = self._decode(self._last_string)
+                self._after_colon = True
+            elif char == "," and self._depth == 1:
+                self._key = None
+                self._after_colon = False
+            elif not char.isspace():
+                self._after_colon = False
+            i += 1
+
+        self._pos = i
+        if self._answer_pos is not None:
+            self._emit_answer(events, i)
+
+    def _emit_answer(self, events: List[Tuple[str, Any]], end: int) -> None:
+        raw = self.text[self._answer_pos:end]
+        self._answer_pos = end
+        if not raw:
+            return
+        piece = self._decode(f'"{raw}"')
+        if piece is None:
+            piece = raw
+        self.answer_streamed = True
+        events.append((TEXT_EVENT, piece))
+
+    @staticmethod
+    def _decode(raw: Optional[str]) -> Optional[str]:
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
@@ -1,65 +1,367 @@
 import json
-from typing import Dict, List, Any, Union
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Any, Optional, Tuple, Union
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 
+from ..database.models import MessageRecord
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate: about 4 characters per token."""
+    return len(text) // 4 + 1
+
+
 class Message:
-    def __init__(self, role: str, content: str):
+    """
+    Single message of the conversation.
+
+    Structured content (tool results) is kept as is and serialized to JSON
+    only once, on first access to content.
+    """
+    __slots__ = ("role", "_content", "_raw", "tokens", "_wire")
+
+    def __init__(self, role: str, content: Union[str, Dict, List, Any], tokens: Optional[int] = None):
         self.role = role
-        self.content = content
+        if isinstance(content, str):
+            self._content = content
+            self._raw = None
+        else:
+            self._content = None
+            self._raw = content
+        self.tokens = tokens
+        self._wire: Optional[Dict[str, str]] = None
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = json.dumps(self._raw, ensure_ascii=False)
+            self._raw = None
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self._raw = None
+        self.tokens = None
+        if self._wire is not None:
+            self._wire["content"] = value
+
+    def to_dict(self) -> Dict[str, str]:
+        """Returns the message in the LLM wire format, built only once."""
+        if self._wire is None:
+            self._wire = {"role": self.role, "content": self.content}
+        return self._wire
 
 
 class MessageStorage:
-    def __init__(self, max_size: int = 20, system_prompt: str = ""):
-        self.messages: List[Message] = []
+    def __init__(
+        self,
+        max_size: Optional[int] = 20,
+        system_prompt: str = "",
+        max_tokens: Optional[int] = None,
+        tokenizer: Callable[[str], int] = None,
+    ):
+        """
+        Args:
+            max_size: maximum number of messages in the window (None - unlimited)
+            system_prompt: system prompt, always kept as the first message
+            max_tokens: token ceiling of the window (None - no token budget)
+            tokenizer: function returning the number of tokens in a text,
+                defaults to estimate_tokens
+        """
         self.max_size = max_size
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer or estimate_tokens
+        self.total_tokens = 0
         self.system_prompt = system_prompt
 
+        self._system: Optional[Message] = None
+        self._history: Deque[Message] = deque()
+
+        # Cached wire view, reused between calls of get_messages_as_dict.
+        # It covers history messages with absolute numbers [_view_lo, _view_hi)
+        self._view: Optional[List[Dict[str, str]]] = None
+        self._view_lo = 0
+        self._view_hi = 0
+        self._added = 0    # messages ever appended to the history
+        self._evicted = 0  # messages ever removed from the head of the history
+
+        # Running size of the history in characters. Structured content is
+        # counted once something else serializes it, so it is never serialized here
+        self._chars = 0
+        self._unsized: List[Message] = []
+
+        # Persistence state: messages appended since the last save_to_db
+        self._next_seq = 0
+        self._unsaved: List[Tuple[int, Message]] = []
+        self._cleared_seq: Optional[int] = None
+        # False until _next_seq continues the stored history (load_from_db or first save_to_db)
+        self._seq_synced = False
+
         if system_prompt:
             self.add_message("system", self.system_prompt)
 
+    @property
+    def messages(self) -> List[Message]:
+        """Snapshot of the window, system prompt first."""
+        if self._system is None:
+            return list(self._history)
+        return [self._system, *self._history]
+
+    def __len__(self) -> int:
+        return len(self._history) + (self._system is not None)
+
+    def _count_chars(self, message: Message) -> None:
+        if message._content is None:
+            self._unsized.append(message)
+        else:
+            self._chars += len(message._content)
+
+    def _uncount_chars(self, message: Message) -> None:
+        for index, unsized in enumerate(self._unsized):
+            if unsized is message:
+                del self._unsized[index]
+                return
+        self._chars -= len(message._content)
+
+    @property
+    def history_chars(self) -> int:
+        """
+        Characters of the window, system prompt included, kept as a running count.
+
+        Structured content that was not serialized yet is not counted.
+        """
+        if self._unsized:
+            pending = []
+            for message in self._unsized:
+                if message._content is None:
+                    pending.append(message)
+                else:
+                    self._chars += len(message._content)
+            self._unsized = pending
+        system = len(self._system.content) if self._system is not None else 0
+        return self._chars + system
+
+    def _count_tokens(self, message: Message) -> int:
+        """Returns the token count of a message, computing it only once."""
+        if message.tokens is None:
+            message.tokens = self.tokenizer(message.content)
+        return message.tokens
+
     def update_system_prompt(self, new_prompt: str) -> None:
         """Updates system prompt and reinitializes the agent"""
         self.system_prompt = new_prompt
-        
-        if not self.messages:
-            self.add_message("system", self.system_prompt)
-        else:
-            self.messages[0].content = self.system_prompt
+
+        if self._system is None:
+            self._system = Message("system", self.system_prompt)
+            self._view = None
+            if self.max_tokens is not None:
+                self.total_tokens += self._count_tokens(self._system)
+            self._trim()
+            return
+
+        if self.max_tokens is not None:
+            self.total_tokens -= self._count_tokens(self._system)
+        self._system.content = self.system_prompt
+        if self.max_tokens is not None:
+            self.total_tokens += self._count_tokens(self._system)
+            self._trim()
 
     def add_message(self, role: str, content: Union[str, Dict, List, Any]):
-        # Convert content to string if it's not already a string
-        if not isinstance(content, str):
-            content = json.dumps(content, ensure_ascii=False)
+        message = Message(role, content)
+
+        if role == "system" and self._system is None and not self._history:
+            self._system = message
+            self._view = None
+        else:
+            self._history.append(message)
+            self._added += 1
+            self._count_chars(message)
+            self._unsaved.append((self._next_seq, message))
+            self._next_seq += 1
+
+        if self.max_tokens is not None:
+            self.total_tokens += self._count_tokens(message)
 
-        self.messages.append(Message(role, content))
+        self._trim()
 
+    def _trim(self) -> None:
+        """Removes the oldest messages while the window exceeds its limits."""
         # Remove the oldest message if the size exceeds the limit
-        if len(self.messages) > self.max_size:
-            self.messages.pop(1)  # Keep system prompt
+        if self.max_size is not None:
+            limit = max(1, self.max_size - (self._system is not None))
+            while len(self._history) > limit:
+                self._pop_oldest()
+
+        # Keep system prompt and at least the newest message within the token budget
+        if self.max_tokens is not None:
+            while self.total_tokens > self.max_tokens and len(self._history) > 1:
+                self._pop_oldest()
+
+    def _pop_oldest(self) -> Message:
+        message = self._history.popleft()
+        self._evicted += 1
+        self._uncount_chars(message)
+        if self.max_tokens is not None:
+            self.total_tokens -= self._count_tokens(message)
+        return message
 
     def get_messages(self) -> List[Message]:
         return self.messages
-    
+
     def get_messages_as_dict(self) -> List[Dict[str, str]]:
-        return [{"role": message.role, "content": message.content} for message in self.messages]
-    
+        """
+        Returns the window in the LLM wire format.
+
+        The list is cached and updated in place on the next call, so callers
+        must not modify it or keep it across storage updates.
+        """
+        if self._view is None:
+            self._view = [self._system.to_dict()] if self._system is not None else []
+            self._view_lo = self._view_hi = self._evicted
+
+        offset = self._system is not None
+
+        # Drop evicted messages from the head in one go
+        stale = min(self._evicted, self._view_hi) - self._view_lo
+        if stale > 0:
+            del self._view[offset:offset + stale]
+        self._view_lo = max(self._view_lo, self._evicted)
+        self._view_hi = max(self._view_hi, self._view_lo)
+
+        # Append messages added since the previous call
+        fresh = self._added - self._view_hi
+        if fresh > 0:
+            tail = list(islice(reversed(self._history), fresh))
+            self._view.extend(message.to_dict() for message in reversed(tail))
+            self._view_hi = self._added
+
+        return self._view
+
     def clear_messages(self):
-        if self.messages and self.messages[0].role == "system":
-            self.messages = self.messages[:1]  # Keep only system message
+        self._history.clear()
+        self._chars = 0
+        self._unsized.clear()
+        self._unsaved.clear()
+        self._cleared_seq = self._next_seq
+        self._evicted = self._added
+        self._view = None
+        if self._system is not None:
+            self.total_tokens = self._system.tokens or 0
         else:
-            self.messages = []
+            self.total_tokens = 0
             if self.system_prompt:
                 self.add_message("system", self.system_prompt)
 
     def clone(self):
-        msg_storage = MessageStorage(max_size=self.max_size, system_prompt=self.system_prompt)
-        msg_storage.messages = self.messages.copy()
+        msg_storage = MessageStorage(
+            max_size=self.max_size,
+            system_prompt=self.system_prompt,
+            max_tokens=self.max_tokens,
+            tokenizer=self.tokenizer
+        )
+        msg_storage._history = self._history.copy()
+        msg_storage._chars = self._chars
+        msg_storage._unsized = list(self._unsized)
+        msg_storage._added = len(msg_storage._history)
+        msg_storage._next_seq = self._next_seq
+        msg_storage._seq_synced = self._seq_synced
+        msg_storage.total_tokens = self.total_tokens
         return msg_storage
-    
-    def load_from_db(self, unique_id: str, session: Session):
-        # Implement loading from database
-        pass
+
+    @property
+    def unsaved_count(self) -> int:
+        """Number of messages appended since the last save_to_db."""
+        return len(self._unsaved)
+
+    def load_from_db(self, unique_id: str, session: Session, page_size: int = 64):
+        """
+        Replaces the history with the newest stored messages of the agent.
+        
+        Only the tail that fits in the window (max_size and max_tokens) is read,
+        newest first, using the (agent_id, seq) index.
+        """
+        query = (
+            session.query(MessageRecord.seq, MessageRecord.role, MessageRecord.content)
+            .filter(MessageRecord.agent_id == unique_id)
+            .order_by(MessageRecord.seq.desc())
+        )
+        size_limit = None
+        if self.max_size is not None:
+            size_limit = max(1, self.max_size - (self._system is not None or bool(self.system_prompt)))
+            query = query.limit(size_limit)
+
+        budget = None
+        if self.max_tokens is not None:
+            budget = self.max_tokens - (self._count_tokens(self._system) if self._system is not None else 0)
+
+        loaded: List[Tuple[int, Message]] = []
+        tokens = 0
+        for seq, role, content in query.yield_per(page_size):
+            message = Message(role, content)
+            if budget is not None:
+                tokens += self._count_tokens(message)
+                if loaded and tokens > budget:
+                    break
+            loaded.append((seq, message))
+
+        self._history.clear()
+        self._history.extend(message for _, message in reversed(loaded))
+        self._chars = sum(len(message.content) for _, message in loaded)
+        self._unsized.clear()
+        self._evicted = self._added
+        self._added += len(loaded)
+        self._view = None
+        self._unsaved.clear()
+        self._cleared_seq = None
+        self._next_seq = loaded[0][0] + 1 if loaded else 0
+        self._seq_synced = True
+        self.total_tokens = sum(self._count_tokens(message) for message in self.messages) if budget is not None else 0
 
     def save_to_db(self, unique_id: str, session: Session):
-        # Implement saving to database
-        pass 
\ No newline at end of file
+        """
+        Writes messages appended since the previous call in one batch.
+        
+        Stored history is append-only; clear_messages only removes the rows
+        written before it. The caller commits the session.
+
+        A storage that was not loaded with load_from_db continues the stored
+        history of the agent: on the first save its messages are numbered
+        after the last stored one.
+        """
+        if not self._seq_synced:
+            self._sync_seq(unique_id, session)
+
+        if self._cleared_seq is not None:
+            session.query(MessageRecord).filter(
+                MessageRecord.agent_id == unique_id,
+                MessageRecord.seq < self._cleared_seq
+            ).delete(synchronize_session=False)
+            self._cleared_seq = None
+
+        if not self._unsaved:
+            return
+
+        session.execute(insert(MessageRecord), [
+            {
+                "agent_id": unique_id,
+                "seq": seq,
+                "role": message.role,
+                "content": message.content
+            }
+            for seq, message in self._unsaved
+        ])
+        self._unsaved.clear()
+
+    def _sync_seq(self, unique_id: str, session: Session) -> None:
+        """Shifts the numbers of unsaved messages past the last stored message of the agent."""
+        last_seq = session.query(func.max(MessageRecord.seq)).filter(MessageRecord.agent_id == unique_id).scalar()
+        if last_seq is not None:
+            shift = last_seq + 1
+            self._unsaved = [(seq + shift, message) for seq, message in self._unsaved]
+            self._next_seq += shift
+            if self._cleared_seq is not None:
+                self._cleared_seq += shift
+        self._seq_synced = True
@@ -0,0 +1,173 @@
+# Standard library imports
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# Third-party imports
+import aiohttp
+
+# Local imports
+from .client import AIClient
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClient(AIClient):
+    """
+    Client for OpenAI-compatible HTTP APIs (OpenAI, vLLM, llama.cpp server, ...).
+
+    All requests share one pooled keep-alive session, created on first use
+    and released by close(). With render_prompt set, concurrent requests
+    are micro-batched into a single /completions call with a list of
+    prompts, which batching servers such as vLLM run as one batch.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:8000/v1",
+        api_key: Optional[str] = None,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+        max_connections: int = 100,
+        keepalive_timeout: float = 60.0,
+        render_prompt: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+        max_batch_size: int = 16,
+        batch_window: float = 0.01,
+        **params: Any
+    ):
+        """
+        Args:
+            model: model name sent with every request
+            base_url: API root, e.g. "http://localhost:8000/v1"
+            api_key: bearer token (None - no authorization header)
+            timeout: total timeout of a request in seconds
+            connect_timeout: timeout of opening a connection in seconds
+            max_connections: max number of pooled connections
+            keepalive_timeout: seconds an idle connection is kept open
+            render_prompt: renders messages into a prompt with the model chat
+                template; enables micro-batching of generate_message calls
+            max_batch_size: max number of prompts in one batch
+            batch_window: seconds to wait for more requests before sending a batch
+            params: extra request fields, e.g. temperature or max_tokens
+        """
+        super().__init__(model, base_url)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.render_prompt = render_prompt
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.params = params
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._batch: List[Tuple[str, asyncio.Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=headers)
+        return self._session
+
+    async def close(self) -> None:
+        """Closes pooled connections."""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        self._flush_batch()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._get_session().post(f"{self.base_url}{path}", json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        if self.render_prompt is not None and self.max_batch_size > 1:
+            return await self._generate_batched(self.render_prompt(messages))
+
+        data = await self._post("/chat/completions", {
+            **self.params,
+            "model": self.model,
+            "messages": messages
+        })
+        return data["choices"][0]["message"]["content"]
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        payload = {**self.params, "model": self.model, "messages": messages, "stream": True}
+        async with self._get_session().post(f"{self.base_url}/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if not chunk.get("choices"):
+                    continue
+                content = chunk["choices"][0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
+    async def _generate_batched(self, prompt: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((prompt, future))
+        if len(self._batch) >= self.max_batch_size:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush_batch)
+        return await future
+
+    def _flush_batch(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        # Requests cancelled while waiting are dropped from the batch
+        batch = [(prompt, future) for prompt, future in self._batch if not future.done()]
+        self._batch = []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            data = await self._post("/completions", {
+                **self.params,
+                "model": self.model,
+                "prompt": [prompt for prompt, _ in batch]
+            })
+            answers = {choice.get("index", i): choice["text"] for i, choice in enumerate(data["choices"])}
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i in answers:
+                future.set_result(answers[i])
+            else:
+                future.set_exception(RuntimeError(f"No completion for prompt {i} in batch response"))
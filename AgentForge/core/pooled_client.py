@@ -0,0 +1,238 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+# Local imports
+from .client import AIClient
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class BackendStats:
+    """Rolling latency and error statistics of one backend."""
+
+    def __init__(self, window: int = 50):
+        """
+        Args:
+            window: number of recent requests the statistics are computed over
+        """
+        self.latencies: deque = deque(maxlen=window)
+        # Elapsed times of requests cancelled before answering; a lower bound
+        # of their latency, so only used for routing, not for hedge delays
+        self.slow: deque = deque(maxlen=window)
+        # Times to the first chunk of streams; much shorter than whole answers,
+        # so kept apart from latencies and only used to rank backends for streams
+        self.first_chunk_latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)  # True - success
+        self.in_flight = 0
+        self.unhealthy_until = 0.0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+
+    def record_first_chunk(self, latency: float) -> None:
+        self.first_chunk_latencies.append(latency)
+        self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+
+    def record_slow(self, elapsed: float) -> None:
+        """Records a request cancelled after elapsed seconds."""
+        self.slow.append(elapsed)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, q: float, include_slow: bool = False) -> Optional[float]:
+        """
+        Returns the q-th (0..1) percentile of recent latencies, or None without samples.
+
+        With include_slow, elapsed times of cancelled requests count as samples too.
+        """
+        return _percentile([*self.latencies, *self.slow] if include_slow else self.latencies, q)
+
+    def first_chunk_percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th (0..1) percentile of recent times to the first chunk of streams."""
+        return _percentile(self.first_chunk_latencies, q)
+
+
+class PooledClient(AIClient):
+    """
+    Client that spreads requests over several backends.
+
+    Each request goes to the healthy backend with the lowest median latency.
+    With hedging enabled, a duplicate request is sent to the next best backend
+    when the first one has not answered within its hedge_percentile latency;
+    the first answer wins and the other request is cancelled. Failed requests
+    are retried on the remaining backends.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[AIClient],
+        window: int = 50,
+        hedge: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 10,
+        hedge_delay: float = 10.0,
+        max_error_rate: float = 0.5,
+        min_error_samples: int = 5,
+        cooldown: float = 30.0,
+    ):
+        """
+        Args:
+            clients: backends, e.g. G4FClient instances for different providers
+            window: number of recent requests per backend the statistics are computed over
+            hedge: send a duplicate request to a second backend when the first one is slow
+            hedge_percentile: latency percentile (0..1) of a backend after which a request is hedged
+            hedge_min_samples: min number of latency samples before the percentile is used
+            hedge_delay: hedge delay in seconds while there are too few samples
+            max_error_rate: error rate after which a backend is taken out of rotation
+            min_error_samples: min number of requests before the error rate is checked
+            cooldown: seconds an unhealthy backend stays out of rotation
+        """
+        assert clients, "At least one client is required"
+        super().__init__(clients[0].model, clients[0].provider)
+        self.clients = list(clients)
+        self.stats: Dict[int, BackendStats] = {index: BackendStats(window) for index in range(len(self.clients))}
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_delay = hedge_delay
+        self.max_error_rate = max_error_rate
+        self.min_error_samples = min_error_samples
+        self.cooldown = cooldown
+        self.hedged = 0  # requests that were hedged
+        self.hedge_wins = 0  # hedged requests answered by the duplicate
+
+    def _is_healthy(self, index: int, now: float) -> bool:
+        return self.stats[index].unhealthy_until <= now
+
+    def _score(self, index: int, stream: bool = False) -> float:
+        stats = self.stats[index]
+        median = stats.first_chunk_percentile(0.5) if stream else stats.percentile(0.5, include_slow=True)
+        # Backends without samples go first so that every backend gets measured
+        return 0.0 if median is None else median * (1 + stats.in_flight)
+
+    def ranked(self, stream: bool = False) -> List[int]:
+        """Returns backend indexes, best first; unhealthy backends go last."""
+        now = time.monotonic()
+        return sorted(
+            range(len(self.clients)),
+            key=lambda index: (not self._is_healthy(index, now), self._score(index, stream))
+        )
+
+    def _mark_failure(self, index: int, error: BaseException) -> None:
+        stats = self.stats[index]
+        stats.record_failure()
+        logger.warning(f"Backend {index} failed: {error}")
+        if len(stats.outcomes) >= self.min_error_samples and stats.error_rate > self.max_error_rate:
+            stats.unhealthy_until = time.monotonic() + self.cooldown
+            stats.outcomes.clear()
+            logger.warning(f"Backend {index} is unhealthy for {self.cooldown}s")
+
+    def _hedge_delay(self, index: int) -> float:
+        stats = self.stats[index]
+        if len(stats.latencies) < self.hedge_min_samples:
+            return self.hedge_delay
+        return stats.percentile(self.hedge_percentile)
+
+    async def _call(self, index: int, messages: List[Dict[str, str]]) -> str:
+        stats = self.stats[index]
+        stats.in_flight += 1
+        started = time.monotonic()
+        try:
+            answer = await self.clients[index].generate_message(messages)
+        except asyncio.CancelledError:
+            stats.record_slow(time.monotonic() - started)
+            raise
+        except Exception as e:
+            self._mark_failure(index, e)
+            raise
+        finally:
+            stats.in_flight -= 1
+        stats.record_success(time.monotonic() - started)
+        return answer
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        candidates = self.ranked()
+        pending: Dict[asyncio.Task, int] = {}
+        last_error: Optional[BaseException] = None
+        hedges = set()  # tasks started as hedged duplicates
+
+        def start_next() -> Optional[asyncio.Task]:
+            if not candidates:
+                return None
+            index = candidates.pop(0)
+            task = asyncio.ensure_future(self._call(index, messages))
+            pending[task] = index
+            return task
+
+        start_next()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and candidates and len(pending) == 1:
+                    timeout = self._hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    self.hedged += 1
+                    hedges.add(start_next())
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        if task in hedges:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                if not pending:
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        # Streams are not hedged; a backend is replaced only if it fails before the first chunk
+        last_error: Optional[BaseException] = None
+        for index in self.ranked(stream=True):
+            stats = self.stats[index]
+            stats.in_flight += 1
+            started = time.monotonic()
+            first = True
+            try:
+                async for chunk in self.clients[index].generate_stream(messages):
+                    if first:
+                        first = False
+                        stats.record_first_chunk(time.monotonic() - started)
+                    yield chunk
+                if first:
+                    stats.record_first_chunk(time.monotonic() - started)
+                return
+            except Exception as e:
+                self._mark_failure(index, e)
+                if not first:
+                    raise
+                last_error = e
+            finally:
+                stats.in_flight -= 1
+        raise last_error
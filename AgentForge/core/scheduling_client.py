@@ -0,0 +1,164 @@
+# Standard library imports
+import asyncio
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+# Local imports
+from .client import AIClient, ClientMiddleware, Priority, current_request_agent_id, current_request_priority
+
+
+class TokenBucket:
+    """Token bucket rate limiter."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: tokens added per second
+            capacity: max number of tokens (burst size), defaults to max(1, rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """Takes a token; returns 0 on success or seconds until a token is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "agent_id", "future")
+
+    def __init__(self, priority: Priority, seq: int, agent_id: Optional[str], future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.agent_id = agent_id
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SchedulingClient(ClientMiddleware):
+    """
+    Client that limits and orders requests to a shared provider.
+
+    Requests wait for a slot under a global and a per-agent concurrency cap
+    and, optionally, a token-bucket rate limit. Waiting requests start in
+    priority order (see Priority), first come first served within a class.
+    Priority and agent are taken from request_context, which Agent.run sets.
+    """
+
+    def __init__(
+        self,
+        client: AIClient,
+        max_concurrency: int = 8,
+        max_per_agent: Optional[int] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        """
+        Args:
+            client: client that makes the requests
+            max_concurrency: max number of requests in flight
+            max_per_agent: max number of requests in flight per agent (None - no limit)
+            rate: max requests per second (None - no rate limit)
+            burst: token bucket capacity, defaults to max(1, rate)
+        """
+        super().__init__(client)
+        self.max_concurrency = max_concurrency
+        self.max_per_agent = max_per_agent
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+        self._active = 0
+        self._active_per_agent: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self._active,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.future.done())
+        }
+
+    def _agent_has_capacity(self, agent_id: Optional[str]) -> bool:
+        if self.max_per_agent is None or agent_id is None:
+            return True
+        return self._active_per_agent.get(agent_id, 0) < self.max_per_agent
+
+    def _dispatch(self) -> None:
+        """Grants free slots to the waiters with the highest priority."""
+        blocked = []
+        while self._waiters and self._active < self.max_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue  # cancelled
+            if not self._agent_has_capacity(waiter.agent_id):
+                blocked.append(waiter)
+                continue
+            if self.bucket is not None:
+                delay = self.bucket.try_take()
+                if delay > 0:
+                    blocked.append(waiter)
+                    if self._timer is None:
+                        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                    break
+            self._active += 1
+            if waiter.agent_id is not None:
+                self._active_per_agent[waiter.agent_id] = self._active_per_agent.get(waiter.agent_id, 0) + 1
+            waiter.future.set_result(None)
+
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    async def _acquire(self, priority: Priority, agent_id: Optional[str]) -> None:
+        waiter = _Waiter(priority, next(self._seq), agent_id, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted right before cancellation
+                self._release(agent_id)
+            raise
+
+    def _release(self, agent_id: Optional[str]) -> None:
+        self._active -= 1
+        if agent_id is not None:
+            remaining = self._active_per_agent.get(agent_id, 1) - 1
+            if remaining:
+                self._active_per_agent[agent_id] = remaining
+            else:
+                self._active_per_agent.pop(agent_id, None)
+        self._dispatch()
+
+    async def generate_message(self, messages: List[Dict[str, str]]) -> str:
+        agent_id = current_request_agent_id()
+        await self._acquire(current_request_priority(), agent_id)
+        try:
+            return await self.inner.generate_message(messages)
+        finally:
+            self._release(agent_id)
+
+    async def generate_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        agent_id = current_request_agent_id()
+        await self._acquire(current_request_priority(), agent_id)
+        try:
+            async for chunk in self.inner.generate_stream(messages):
+                yield chunk
+        finally:
+            self._release(agent_id)
@@ -0,0 +1,52 @@
+# Standard library imports
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Concurrent callers with the same key await the same underlying call and
+    share its result or exception. A caller that is cancelled only stops
+    waiting; the call itself is cancelled when its last caller goes away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared = 0  # callers that joined a call already in flight
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of factory(), sharing a call in flight for the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(functools.partial(self._forget, key, call))
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: _Call, _task: Any = None) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
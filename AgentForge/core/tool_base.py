@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Hashable, Optional, List
 from dataclasses import dataclass
+from contextvars import ContextVar
+import json
+
+from .tool_cache import tool_result_cache
 
 @dataclass
 class ToolParameter:
@@ -16,6 +20,11 @@ class ToolParameter:
         return f"- {self.name} ({self.type}, {required_str}): {self.description}"
 
 
+_MISSING = object()
+
+# Agent whose run is executing in the current context, set by Agent.run
+current_agent: ContextVar[Optional[Any]] = ContextVar("current_agent", default=None)
+
 BASE_TOOL_PROMPT = """Tool: {name}
 Description: {description}
 Parameters: {parameters}
@@ -23,7 +32,22 @@ Returns: {returns}"""
 
 class BaseTool(ABC):
     """Base class for all tools."""
-    
+
+    # Side-effect-free tools set this to False, so the agent may run
+    # their calls concurrently with other independent calls of the same turn
+    order_sensitive: bool = True
+
+    # Results of tools with a TTL (seconds) are memoized per cache_scope() and cache_key().
+    # The memo and its invalidation are local to the process: a write made by
+    # another worker sharing the database is only seen once the TTL expires,
+    # so tools reading shared rows should keep it short
+    cache_ttl: Optional[float] = None
+    # Names of tools whose memoized results become stale after a call of this tool
+    invalidates: List[str] = []
+
+    # Agent the tool was registered in, set by _register_internal
+    parent_agent = None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -51,13 +75,57 @@ class BaseTool(ABC):
         """Execute tool with given parameters."""
         pass
 
+    async def invoke(self, **kwargs) -> Any:
+        """
+        Executes the tool, reusing a memoized result and invalidating stale ones.
+
+        Invalidation only reaches memoized results of this process.
+        """
+        try:
+            if self.cache_ttl is None:
+                return await self.execute(**kwargs)
+
+            key = tool_result_cache.key(self.name, self.cache_scope(), self.cache_key(**kwargs))
+            result = tool_result_cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = await self.execute(**kwargs)
+                if self.is_cacheable(result):
+                    tool_result_cache.set(key, result, ttl=self.cache_ttl)
+            return result
+        finally:
+            if self.invalidates:
+                scope = self.cache_scope()
+                for tool_name in self.invalidates:
+                    tool_result_cache.invalidate(tool_name, scope)
+
+    def is_cacheable(self, result: Any) -> bool:
+        """Whether a result may be memoized; failures are not, so the next call retries."""
+        return not (isinstance(result, dict) and result.get("success") is False)
+
+    def cache_scope(self) -> Hashable:
+        """Scope of memoized results and invalidations, by default the agent id."""
+        return self.get_parent_agent().get_id()
+
+    def cache_key(self, **kwargs) -> Hashable:
+        """Key of a memoized result within the scope, by default the call parameters."""
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
     def _register_internal(self, parent_agent):
         """Called when the tool is registered in the agent"""
         self.parent_agent = parent_agent
         self.on_register(parent_agent)
 
     def get_parent_agent(self):
-        """Returns the parent agent."""
+        """
+        Returns the agent running the tool.
+
+        Tools are shared by agents spawned from the one they were registered
+        in (see Agent.spawn), so this is the agent of the current run when it
+        owns the tool, and the agent the tool was registered in otherwise.
+        """
+        agent = current_agent.get()
+        if agent is not None and agent.tools.get(self.name) is self:
+            return agent
         return self.parent_agent
     
     def on_register(self, parent_agent):
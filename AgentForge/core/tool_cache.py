@@ -0,0 +1,85 @@
+# Standard library imports
+import itertools
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Local imports
+from .cache import LRUCache
+
+
+class ToolResultCache:
+    """
+    Bounded store of memoized tool results.
+
+    Entries are grouped by (tool name, scope), where the scope is usually the
+    agent id. Invalidating a group moves it to a new generation, so its old
+    entries are never returned again and age out of the LRU.
+
+    Results live at most max_ttl seconds, so the generation of a group is
+    only kept for max_ttl seconds after its last invalidation: by then no
+    result of an older generation is alive. Memory used for generations is
+    bounded by the invalidations of the last max_ttl seconds, not by the
+    number of agents ever seen.
+    """
+
+    def __init__(self, max_size: int = 1024, max_ttl: float = 600.0):
+        """
+        Args:
+            max_size: max number of results kept
+            max_ttl: max lifetime of a result in seconds; longer TTLs are shortened to it
+        """
+        self.results = LRUCache(max_size=max_size)
+        self.max_ttl = max_ttl
+        # Group -> (generation, time after which the entry may be dropped)
+        self._generations: Dict[Tuple[str, Hashable], Tuple[int, float]] = {}
+        # Generations are never reused, so a dropped group cannot revive old results
+        self._counter = itertools.count(1)
+        self._next_sweep = time.monotonic() + max_ttl
+
+    def _generation(self, tool_name: str, scope: Hashable) -> int:
+        entry = self._generations.get((tool_name, scope))
+        return entry[0] if entry is not None else 0
+
+    def key(self, tool_name: str, scope: Hashable, call_key: Hashable) -> tuple:
+        """
+        Returns the key of a call result in the current generation of its group.
+
+        Take the key before running the call: a result computed while the
+        group was invalidated is then not stored.
+        """
+        return (tool_name, scope, self._generation(tool_name, scope), call_key)
+
+    def get(self, key: tuple, default: Any = None) -> Any:
+        return self.results.get(key, default)
+
+    def set(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        tool_name, scope, generation, _ = key
+        if generation != self._generation(tool_name, scope):
+            return
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        self.results.set(key, value, ttl=ttl)
+
+    def invalidate(self, tool_name: str, scope: Hashable) -> None:
+        """Drops all results of a tool within a scope."""
+        now = time.monotonic()
+        self._generations[(tool_name, scope)] = (next(self._counter), now + self.max_ttl)
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        """Drops generations that outlived every result of older generations."""
+        self._generations = {
+            group: entry for group, entry in self._generations.items() if entry[1] > now
+        }
+        self._next_sweep = now + self.max_ttl
+
+    def clear(self) -> None:
+        # Generations are kept, so results of calls in flight stay stale
+        self.results.clear()
+
+    def stats(self) -> dict:
+        return {**self.results.stats(), "generations": len(self._generations)}
+
+
+# Shared by all tools, so that write tools can invalidate results of read tools
+tool_result_cache = ToolResultCache()
@@ -0,0 +1,57 @@
+# Standard library imports
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional
+
+# Local imports
+from .tool_base import BaseTool
+
+
+class ToolRegistry(Mapping):
+    """
+    Tools by name, with their prompt descriptions rendered once.
+
+    A registry can be built once and passed to many agents: an agent never
+    changes a registry it was given, it registers further tools on a copy.
+    The description of each tool is rendered when it is registered and the
+    description of all tools is assembled from these pieces on first use.
+    """
+
+    def __init__(self, tools: Iterable[BaseTool] = ()):
+        self._tools: Dict[str, BaseTool] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._description: Optional[str] = None
+        self.register_all(tools)
+
+    def __getitem__(self, name: str) -> BaseTool:
+        return self._tools[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def register(self, tool: BaseTool) -> None:
+        """Adds a tool, replacing a tool with the same name."""
+        self.register_all([tool])
+
+    def register_all(self, tools: Iterable[BaseTool]) -> None:
+        """Adds several tools; the description of all tools is assembled again only once."""
+        for tool in tools:
+            self._tools[tool.name] = tool
+            self._descriptions[tool.name] = tool.to_string()
+            self._description = None
+
+    def description(self) -> str:
+        """Returns descriptions of all tools for the system prompt."""
+        if self._description is None:
+            self._description = "\n".join(self._descriptions.values())
+        return self._description
+
+    def copy(self) -> "ToolRegistry":
+        """Returns a registry with the same tools, reusing their rendered descriptions."""
+        registry = ToolRegistry()
+        registry._tools = dict(self._tools)
+        registry._descriptions = dict(self._descriptions)
+        registry._description = self._description
+        return registry
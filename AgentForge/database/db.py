@@ -1,25 +1,141 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import contextmanager, asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Generator, Optional, Union
 import functools
+import logging
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Async drivers used for the default dialects
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_url(url: str) -> Optional[str]:
+    """Returns the async driver URL for a database URL, or None if there is none."""
+    parsed = make_url(url)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        return None
+    # In-memory SQLite is per connection, so both engines must share the sync one
+    if parsed.drivername == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+
+
+class SyncSessionAdapter:
+    """Awaitable facade over a synchronous Session, used when no async driver is available."""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return self.sync_session.scalar(statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return self.sync_session.scalars(statement, params, **kwargs)
+
+    async def get(self, entity, ident):
+        return self.sync_session.get(entity, ident)
+
+    async def delete(self, instance: Any) -> None:
+        self.sync_session.delete(instance)
+
+    async def flush(self) -> None:
+        self.sync_session.flush()
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
 class Database:
+    """
+    Sync engine and, when an async driver is installed, an async engine.
+
+    The async engine keeps a worker thread that holds the process open until
+    the engine is disposed, so applications that init_db with use_async
+    must await close() on shutdown.
+    """
+
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
-        
-    def init_db(self, url: str = None):
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.full_text_search = False
+
+    def init_db(self, url: str = None, use_async: bool = True, full_text_search: bool = True):
+        """
+        Args:
+            url: database URL
+            use_async: also create an async engine when an async driver
+                (e.g. aiosqlite) is installed; the sync engine is the fallback
+            full_text_search: create SQLite FTS5 indexes for todo and reminder search
+        """
         assert url is not None, "Database URL is required"
-        
+
         self.url = url
         self.engine = create_engine(self.url)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         Base.metadata.create_all(bind=self.engine)
-        
+
+        self.full_text_search = False
+        if full_text_search:
+            # Imported here: search module depends on models, which depend on this module
+            from .search import setup_full_text_search
+            self.full_text_search = setup_full_text_search(self.engine)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if use_async:
+            self._init_async()
+
+    def _init_async(self):
+        async_url = get_async_url(self.url)
+        if async_url is None:
+            return
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            self.async_engine = create_async_engine(async_url)
+        except ImportError as e:
+            logger.warning(f"Async database driver is not available, using sync sessions: {e}")
+            return
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+
+    @property
+    def is_async(self) -> bool:
+        """True if sessions run on the async engine."""
+        return self.AsyncSessionLocal is not None
+
     @contextmanager
     def get_session(self) -> Generator[Session, None, None]:
         session = self.SessionLocal()
@@ -32,6 +148,29 @@ class Database:
         finally:
             session.close()
 
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncGenerator[Union["AsyncSession", SyncSessionAdapter], None]:
+        """Yields an AsyncSession, or a SyncSessionAdapter if the async engine is not available."""
+        if self.AsyncSessionLocal is None:
+            with self.get_session() as session:
+                yield SyncSessionAdapter(session)
+            return
+
+        async with self.AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def close(self):
+        """Disposes database engines."""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        if self.engine is not None:
+            self.engine.dispose()
+
 
 # Create global database instance
 db = Database()
@@ -42,4 +181,17 @@ def with_session(func):
     async def wrapper(*args, **kwargs):
         with db.get_session() as session:
             return await func(*args, session=session, **kwargs)
-    return wrapper 
\ No newline at end of file
+    return wrapper
+
+def with_async_session(func):
+    """
+    Decorator for automatic async session management.
+
+    The session does not block the event loop when the async engine is
+    available and falls back to a synchronous session otherwise.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with db.get_async_session() as session:
+            return await func(*args, session=session, **kwargs)
+    return wrapper
@@ -1,30 +1,110 @@
-from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean, Index, Select, Update, or_, select, update
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 
 from .db import Base
 from sqlalchemy.orm import Session
 
 class Reminder(Base):
     __tablename__ = 'reminders'
+    __table_args__ = (
+        Index('ix_reminders_agent_time', 'agent_id', 'reminder_time', 'id'),
+    )
     
     id = Column(String, primary_key=True)
     agent_id = Column(String, nullable=False) # For agent identification
     
     text = Column(String, nullable=False)
-    reminder_time = Column(DateTime, nullable=False)
+    reminder_time = Column(DateTime, nullable=False, index=True)
+
+    # Lease of the worker that is delivering the reminder
+    claimed_by = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
     
     @classmethod
-    def get_due_reminders(cls, session: Session) -> List['Reminder']:
+    def due_reminders_query(cls) -> Select:
         current_time = datetime.now()
-        return session.query(cls).filter(cls.reminder_time <= current_time).all()
+        return select(cls).where(cls.reminder_time <= current_time)
+
+    @classmethod
+    def get_due_reminders(cls, session: Session) -> List['Reminder']:
+        return session.scalars(cls.due_reminders_query()).all()
+
+    @classmethod
+    def agent_reminders_query(
+        cls,
+        agent_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+        limit: Optional[int] = None
+    ) -> Select:
+        """Reminders of one agent ordered by time; after is the (reminder_time, id) keyset cursor."""
+        query = select(cls).where(cls.agent_id == agent_id).order_by(cls.reminder_time, cls.id)
+        if start is not None:
+            query = query.where(cls.reminder_time >= start)
+        if end is not None:
+            query = query.where(cls.reminder_time <= end)
+        if after is not None:
+            after_time, after_id = after
+            query = query.where(or_(
+                cls.reminder_time > after_time,
+                (cls.reminder_time == after_time) & (cls.id > after_id)
+            ))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @classmethod
+    def claim_due_query(cls, worker_id: str, now: datetime, lease_until: datetime, limit: int) -> Update:
+        """Atomically leases up to limit due reminders that are not leased by another worker."""
+        claimable = (cls.reminder_time <= now) & or_(cls.lease_until.is_(None), cls.lease_until < now)
+        due_ids = (
+            select(cls.id)
+            .where(claimable)
+            .order_by(cls.reminder_time)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        return (
+            update(cls)
+            .where(cls.id.in_(due_ids), claimable)
+            .values(claimed_by=worker_id, lease_until=lease_until)
+            .execution_options(synchronize_session=False)
+        )
 
 class TodoItem(Base):
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_agent_id', 'agent_id', 'id'),
+    )
     
     id = Column(String, primary_key=True)
     agent_id = Column(String, nullable=False) # For agent identification
 
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    completed = Column(Boolean, default=False)
\ No newline at end of file
+    completed = Column(Boolean, default=False)
+
+    @classmethod
+    def agent_todos_query(cls, agent_id: str, after_id: Optional[str] = None, limit: Optional[int] = None) -> Select:
+        """Todos of one agent ordered by id; after_id is the keyset cursor."""
+        query = select(cls).where(cls.agent_id == agent_id).order_by(cls.id)
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+class MessageRecord(Base):
+    __tablename__ = 'messages'
+    __table_args__ = (
+        Index('ix_messages_agent_seq', 'agent_id', 'seq', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    agent_id = Column(String, nullable=False) # For agent identification
+    seq = Column(Integer, nullable=False) # Position of the message in the agent history
+
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
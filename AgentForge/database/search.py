@@ -0,0 +1,148 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+
+from sqlalchemy import inspect, or_, select, text
+from sqlalchemy.engine import Engine
+
+from .db import db
+from .models import Reminder, TodoItem
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Full-text index over text columns of one table."""
+    table: str
+    columns: Tuple[str, ...]
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+TODOS_INDEX = SearchIndex("todos", ("title", "description"))
+REMINDERS_INDEX = SearchIndex("reminders", ("text",))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _create_index_sql(index: SearchIndex) -> List[str]:
+    columns = ", ".join(index.columns)
+    new_values = ", ".join(f"new.{column}" for column in index.columns)
+    old_values = ", ".join(f"old.{column}" for column in index.columns)
+    fts = index.fts_table
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{index.table}', content_rowid='rowid')",
+        f"""CREATE TRIGGER {fts}_ai AFTER INSERT ON {index.table} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END""",
+        f"""CREATE TRIGGER {fts}_ad AFTER DELETE ON {index.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END""",
+        f"""CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {index.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def setup_full_text_search(engine: Engine) -> bool:
+    """
+    Creates SQLite FTS5 indexes over todos and reminders, kept in sync by triggers.
+
+    The indexes refer to the implicit rowid of the tables, so run
+    rebuild_full_text_search after VACUUM. Returns False, and searches fall
+    back to LIKE matching, if the database is not SQLite or has no FTS5.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    try:
+        existing = set(inspect(engine).get_table_names())
+        with engine.begin() as connection:
+            for index in (TODOS_INDEX, REMINDERS_INDEX):
+                if index.fts_table in existing:
+                    continue
+                for statement in _create_index_sql(index):
+                    connection.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"Full-text search is not available, using LIKE fallback: {e}")
+        return False
+
+    return True
+
+
+def rebuild_full_text_search(engine: Engine) -> None:
+    """Rebuilds FTS5 indexes from their tables."""
+    with engine.begin() as connection:
+        for index in (TODOS_INDEX, REMINDERS_INDEX):
+            connection.execute(text(f"INSERT INTO {index.fts_table}({index.fts_table}) VALUES ('rebuild')"))
+
+
+def _tokenize(query: str) -> List[str]:
+    return [token.lower() for token in _TOKEN_RE.findall(query)]
+
+
+def _fts_query(tokens: List[str]) -> str:
+    # Quoted prefix terms joined by OR: no FTS5 syntax from user input, bm25 ranks by matches
+    return " OR ".join(f'"{token}"*' for token in tokens)
+
+
+async def _fts_search(session, index: SearchIndex, agent_id: str, tokens: List[str], limit: int) -> List[Any]:
+    fts = index.fts_table
+    statement = text(
+        f"SELECT t.id FROM {fts} JOIN {index.table} t ON t.rowid = {fts}.rowid "
+        f"WHERE {fts} MATCH :query AND t.agent_id = :agent_id "
+        f"ORDER BY bm25({fts}) LIMIT :limit"
+    )
+    rows = (await session.execute(statement, {
+        "query": _fts_query(tokens),
+        "agent_id": agent_id,
+        "limit": limit
+    })).all()
+    return [row[0] for row in rows]
+
+
+async def _like_search(session, model, index: SearchIndex, agent_id: str, tokens: List[str], limit: int) -> List[Any]:
+    columns = [getattr(model, column) for column in index.columns]
+    conditions = [column.ilike(f"%{token}%") for token in tokens for column in columns]
+    candidates = (await session.scalars(
+        select(model).where(model.agent_id == agent_id, or_(*conditions))
+    )).all()
+
+    def score(item) -> int:
+        content = " ".join(str(getattr(item, column) or "") for column in index.columns).lower()
+        return sum(content.count(token) for token in tokens)
+
+    candidates = sorted(candidates, key=score, reverse=True)
+    return [item.id for item in candidates[:limit]]
+
+
+async def _search(session, model, index: SearchIndex, agent_id: str, query: str, limit: int) -> List[Any]:
+    tokens = _tokenize(query)
+    if not tokens:
+        return []
+
+    if db.full_text_search:
+        ids = await _fts_search(session, index, agent_id, tokens, limit)
+    else:
+        ids = await _like_search(session, model, index, agent_id, tokens, limit)
+    if not ids:
+        return []
+
+    items = {item.id: item for item in (await session.scalars(select(model).where(model.id.in_(ids)))).all()}
+    return [items[item_id] for item_id in ids if item_id in items]
+
+
+async def search_todos(session, agent_id: str, query: str, limit: int = 5) -> List[TodoItem]:
+    """Returns todos of the agent best matching the query, best first."""
+    return await _search(session, TodoItem, TODOS_INDEX, agent_id, query, limit)
+
+
+async def search_reminders(session, agent_id: str, query: str, limit: int = 5) -> List[Reminder]:
+    """Returns reminders of the agent best matching the query, best first."""
+    return await _search(session, Reminder, REMINDERS_INDEX, agent_id, query, limit)
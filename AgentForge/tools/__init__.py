@@ -1,5 +1,14 @@
 from .reminder_tool import ReminderAgentTool
 from .todo_tool import TodoAgentTool
 from .search_tool import SearchAgentTool
+from .http_session import close_http_sessions
+from .parse_executor import ParseExecutor, shutdown_parse_executor
 
-__all__ = ["ReminderAgentTool", "TodoAgentTool", "SearchAgentTool"]
+__all__ = [
+    "ReminderAgentTool",
+    "TodoAgentTool",
+    "SearchAgentTool",
+    "ParseExecutor",
+    "close_http_sessions",
+    "shutdown_parse_executor"
+]
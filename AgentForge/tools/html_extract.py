@@ -0,0 +1,249 @@
+# Standard library imports
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+# Third party imports
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+# Local imports
+from AgentForge.tools.parse_executor import PROCESS, ParseExecutor
+
+# Size of the chunks the body is read and parsed in
+CHUNK_SIZE = 64 * 1024
+# Max number of bytes of a page that are downloaded
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# Elements whose text is collected
+TEXT_TAGS = frozenset(["p", "h1", "h2", "h3", "h4", "h5", "h6"])
+# Elements skipped together with their content
+SKIP_TAGS = frozenset(["script", "style", "nav", "header", "footer", "aside", "iframe", "form", "noscript", "template", "svg"])
+# Words of class names of elements that usually hold ads or irrelevant content
+SKIP_CLASS_WORDS = frozenset(["ad", "ads", "advert", "advertisement", "banner", "popup", "modal", "cookie", "cookies"])
+# Elements without an end tag
+VOID_TAGS = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"])
+
+_CLASS_SPLIT_RE = re.compile(r"[\s_-]+")
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+
+def sniff_charset(head: bytes) -> Optional[str]:
+    """Returns the charset declared by a meta tag in the beginning of a page, or None."""
+    match = _META_CHARSET_RE.search(head)
+    return match.group(1).decode("ascii") if match else None
+
+
+def _is_skipped(tag: str, attrs: Dict[str, str]) -> bool:
+    if tag in SKIP_TAGS:
+        return True
+    classes = attrs.get("class")
+    return bool(classes) and any(word in SKIP_CLASS_WORDS for word in _CLASS_SPLIT_RE.split(classes.lower()))
+
+
+class _TextCollector:
+    """Parser target that collects paragraph and heading text until max_chars is reached."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.paragraphs: List[str] = []
+        self.length = 0
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._text_tag: Optional[str] = None
+        self._buffer: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.length >= self.max_chars
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag not in VOID_TAGS and _is_skipped(tag, attrs):
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        if tag in TEXT_TAGS:
+            # An unclosed paragraph ends where the next one starts
+            self._flush()
+            self._text_tag = tag
+
+    def end(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag == self._text_tag:
+            self._flush()
+
+    def data(self, text: str) -> None:
+        if self._text_tag is not None and self._skip_tag is None:
+            self._buffer.append(text)
+
+    def close(self) -> str:
+        self._flush()
+        return "\n".join(self.paragraphs)
+
+    def _flush(self) -> None:
+        if self._text_tag is None:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        self._text_tag = None
+        if text and not self.done:
+            self.paragraphs.append(text)
+            self.length += len(text) + 1
+
+
+class _StdlibParser(HTMLParser):
+    """Feeds html.parser events into a collector, used when lxml is not installed."""
+
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class HTMLTextExtractor:
+    """
+    Incremental extractor of readable text from HTML.
+
+    The page is fed chunk by chunk as it is downloaded; feed() returns True
+    once max_chars of text is collected, so the rest of the page can be
+    skipped. Uses lxml when it is installed and html.parser otherwise.
+    Neither backend builds a document tree.
+    """
+
+    def __init__(self, max_chars: int, encoding: Optional[str] = None):
+        """
+        Args:
+            max_chars: number of characters of text after which extraction stops
+            encoding: charset of the page, if known from the response headers;
+                otherwise taken from a meta tag in the first chunk, or utf-8
+        """
+        self.collector = _TextCollector(max_chars)
+        self.encoding = encoding
+        self._parser = None
+        self._decoder = None
+
+    def _start(self, head: bytes) -> None:
+        """Creates the parser once the first chunk tells the charset."""
+        encoding = self.encoding or sniff_charset(head) or "utf-8"
+        if etree is not None:
+            try:
+                self._parser = etree.HTMLParser(target=self.collector, encoding=encoding, no_network=True)
+            except LookupError:
+                # Unknown charset, let libxml2 detect it
+                self._parser = etree.HTMLParser(target=self.collector, no_network=True)
+        else:
+            self._parser = _StdlibParser(self.collector)
+            self._decoder = codecs.getincrementaldecoder(self._codec(encoding))(errors="replace")
+
+    @staticmethod
+    def _codec(encoding: Optional[str]) -> str:
+        try:
+            return codecs.lookup(encoding).name if encoding else "utf-8"
+        except LookupError:
+            return "utf-8"
+
+    @property
+    def done(self) -> bool:
+        return self.collector.done
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parses the next chunk of the page; returns True when enough text is collected."""
+        if self._parser is None:
+            self._start(chunk)
+        if self._decoder is not None:
+            self._parser.feed(self._decoder.decode(chunk))
+        else:
+            self._parser.feed(chunk)
+        return self.collector.done
+
+    def close(self) -> str:
+        """Returns the collected text, paragraphs separated by newlines."""
+        if self._parser is None:
+            return self.collector.close()
+        try:
+            if self._decoder is not None:
+                self._parser.feed(self._decoder.decode(b"", final=True))
+            self._parser.close()
+        except Exception:
+            # Truncated or malformed markup; keep what was collected so far
+            pass
+        return self.collector.close()
+
+
+def extract_text(html: bytes, max_chars: int, encoding: Optional[str] = None) -> str:
+    """Extracts readable text from a whole page."""
+    extractor = HTMLTextExtractor(max_chars, encoding)
+    for start in range(0, len(html), CHUNK_SIZE):
+        if extractor.feed(html[start:start + CHUNK_SIZE]):
+            break
+    return extractor.close()
+
+
+async def read_body(response, max_bytes: int = MAX_PAGE_BYTES) -> bytes:
+    """Reads at most max_bytes of an aiohttp response body."""
+    chunks = []
+    received = 0
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        chunk = chunk[:max_bytes - received]
+        chunks.append(chunk)
+        received += len(chunk)
+        if received >= max_bytes:
+            break
+    return b"".join(chunks)
+
+
+async def extract_response_text(
+    response,
+    max_chars: int,
+    max_bytes: int = MAX_PAGE_BYTES,
+    executor: Optional[ParseExecutor] = None
+) -> str:
+    """
+    Downloads and extracts readable text of an aiohttp response.
+
+    The body is parsed as it arrives and reading stops once max_chars of text
+    is collected; with an executor in thread mode each chunk is parsed in the
+    pool. A process executor cannot keep the parser state between chunks, so
+    there the body (at most max_bytes) is read whole and parsed in one job;
+    pages known to be small are still streamed on the loop.
+    """
+    if (
+        executor is not None
+        and executor.mode == PROCESS
+        and (response.content_length is None or response.content_length >= executor.inline_threshold)
+    ):
+        body = await read_body(response, max_bytes)
+        return await executor.run(extract_text, body, max_chars, response.charset, size=len(body))
+
+    extractor = HTMLTextExtractor(max_chars, response.charset)
+    received = 0
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        if executor is not None and executor.mode != PROCESS:
+            done = await executor.run(extractor.feed, chunk, size=len(chunk))
+        else:
+            done = extractor.feed(chunk)
+        if done or received >= max_bytes:
+            break
+    return extractor.close()
@@ -0,0 +1,99 @@
+# Standard library imports
+import asyncio
+import logging
+from typing import Dict, Optional
+
+# Third party imports
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+
+class HTTPSessionPool:
+    """
+    Process-wide aiohttp session shared by the web tools.
+
+    The session is created on first use and keeps connections alive between
+    calls, with per-host connection limits and a DNS cache. aiohttp sessions
+    are bound to an event loop, so a new one is created when the loop changes.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 8,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            limit: max number of open connections
+            limit_per_host: max number of open connections to one host
+            keepalive_timeout: seconds an idle connection is kept open
+            dns_cache_ttl: seconds resolved addresses are cached
+            timeout: default total timeout of a request in seconds
+            headers: default request headers
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self.headers = headers if headers is not None else DEFAULT_HEADERS
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> aiohttp.ClientSession:
+        """Returns the shared session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                self._discard(self._session, self._loop)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers
+            )
+            self._loop = loop
+        return self._session
+
+    @staticmethod
+    def _discard(session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Closes a session of another event loop that is being replaced."""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        # Its loop has finished, so the close runs on the current one
+        logger.warning("HTTP session of a finished event loop was not closed; call close_http_sessions() before the loop ends")
+        task = asyncio.ensure_future(session.close())
+        task.add_done_callback(
+            lambda t: t.cancelled() or t.exception() is None
+            or logger.debug(f"Failed to close HTTP session of a finished event loop: {t.exception()}")
+        )
+
+    async def close(self) -> None:
+        """Closes the shared session; the next get() opens a new one."""
+        session, self._session = self._session, None
+        if session is not None and not session.closed and self._loop is asyncio.get_running_loop():
+            await session.close()
+        self._loop = None
+
+
+http_sessions = HTTPSessionPool()
+
+
+async def close_http_sessions() -> None:
+    """Shutdown hook: closes the shared session of the web tools."""
+    await http_sessions.close()
@@ -0,0 +1,126 @@
+# Standard library imports
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+# Third party imports
+try:
+    import lxml  # noqa: F401
+except ImportError:  # pragma: no cover - lxml is optional
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+PROCESS = "process"
+THREAD = "thread"
+INLINE = "inline"
+
+# lxml parses in C, so threads keep the streamed early stop at little cost;
+# html.parser is pure Python and needs processes to run in parallel
+DEFAULT_MODE = THREAD if lxml is not None else PROCESS
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ParseExecutor:
+    """
+    Runs CPU-bound page parsing off the event loop.
+
+    Work goes to a process pool (scales across cores), a thread pool, or runs
+    inline. At most max_pending jobs are queued at once; further callers wait
+    for a slot, so the memory held by queued pages stays bounded. Inputs
+    smaller than inline_threshold bytes are parsed inline, where the pool
+    round trip would cost more than the parsing itself. If the pool cannot be
+    started or breaks, work falls back to inline execution.
+
+    Worker processes are started with forkserver or spawn, not fork: the
+    parent runs database and search threads, and a forked child could
+    inherit their locks in a held state. As with any spawned workers, the
+    main module must start the application under if __name__ == "__main__".
+    """
+
+    def __init__(
+        self,
+        mode: str = DEFAULT_MODE,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        inline_threshold: int = 64 * 1024,
+    ):
+        """
+        Args:
+            mode: "process", "thread" or "inline"; defaults to "thread" when
+                lxml is installed and "process" otherwise
+            max_workers: number of workers, defaults to the number of CPUs (at most 4)
+            max_pending: max number of jobs queued or running, defaults to 2 * max_workers
+            inline_threshold: inputs smaller than this many bytes are parsed inline
+        """
+        assert mode in (PROCESS, THREAD, INLINE), f"Unknown parse executor mode: {mode}"
+        self.mode = mode
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.inline_threshold = inline_threshold
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.mode != INLINE:
+            try:
+                if self.mode == PROCESS:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_process_context())
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+            except (OSError, NotImplementedError, ImportError) as e:
+                logger.warning(f"Parse executor is not available, parsing inline: {e}")
+                self.mode = INLINE
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+        """
+        Returns func(*args), computed in the pool.
+
+        func and args must be picklable in process mode; size is the input
+        size in bytes compared against inline_threshold.
+        """
+        if size < self.inline_threshold:
+            return func(*args)
+        executor = self._get_executor()
+        if executor is None:
+            return func(*args)
+
+        async with self._get_semaphore():
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            except BrokenProcessPool as e:
+                logger.warning(f"Parse process pool is broken, parsing inline: {e}")
+                self._executor = None
+                self.mode = INLINE
+        return func(*args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the workers; a later run() starts new ones."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+parse_executor = ParseExecutor()
+
+
+def shutdown_parse_executor() -> None:
+    """Shutdown hook: stops the workers that parse pages of the web tools."""
+    parse_executor.shutdown()
@@ -0,0 +1,91 @@
+# Standard library imports
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PagePrefetcher:
+    """
+    Starts downloading pages before they are asked for.
+
+    Search tools pass the URLs of their top results to prefetch(); page tools
+    take() the running or finished download instead of starting a new one.
+    Downloads are kept for ttl seconds in a bounded LRU. Evicted and expired
+    downloads that are still running are cancelled, unless a caller has
+    taken them: those are only forgotten and keep running for their callers.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Any]],
+        top_k: int = 3,
+        ttl: float = 60.0,
+        max_size: int = 16,
+    ):
+        """
+        Args:
+            fetch: coroutine function that downloads a page by URL
+            top_k: number of URLs of one prefetch() call that are downloaded
+            ttl: seconds a download is kept
+            max_size: max number of downloads kept
+        """
+        self.fetch = fetch
+        self.top_k = top_k
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self._tasks: "OrderedDict[str, Tuple[asyncio.Task, float]]" = OrderedDict()
+        self._taken: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _drop(self, url: str) -> None:
+        task, _ = self._tasks.pop(url)
+        if not task.done() and task not in self._taken:
+            task.cancel()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for url in [url for url, (_, expires_at) in self._tasks.items() if expires_at <= now]:
+            self._drop(url)
+
+    def prefetch(self, urls: Iterable[str]) -> None:
+        """Starts background downloads of the first top_k URLs."""
+        self._prune()
+        for url in list(urls)[:self.top_k]:
+            if not url or url in self._tasks:
+                continue
+            task = asyncio.ensure_future(self.fetch(url))
+            # Failures are reported to whoever takes the download
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._tasks[url] = (task, time.monotonic() + self.ttl)
+            logger.info(f"Prefetching page: {url}")
+            while len(self._tasks) > self.max_size:
+                self._drop(next(iter(self._tasks)))
+
+    def take(self, url: str) -> Optional[asyncio.Task]:
+        """Returns the download of a URL, or None if it was not prefetched or is no longer usable."""
+        self._prune()
+        entry = self._tasks.get(url)
+        if entry is None:
+            return None
+        task = entry[0]
+        if task.cancelled() or (task.done() and task.exception() is not None):
+            # Failed downloads are not handed out again, the page tool downloads anew
+            self._drop(url)
+            return None
+        self._tasks.move_to_end(url)
+        self._taken.add(task)
+        self.hits += 1
+        return task
+
+    def clear(self) -> None:
+        """Cancels all downloads."""
+        for url in list(self._tasks):
+            self._drop(url)
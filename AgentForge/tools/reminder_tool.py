@@ -1,22 +1,40 @@
 # Standard library imports
 import asyncio
+import heapq
 import logging
+import os
+import socket
+import time
 import uuid
+import weakref
 from datetime import datetime, timedelta
-from typing import Dict, List, Callable
+from typing import Dict, List, Callable, Optional, Tuple, Union
 
 # Third party imports
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Local imports
 from AgentForge.core.tool_base import BaseTool, ToolParameter
 from AgentForge.core.agent import Agent
 from AgentForge.core.message_storage import MessageStorage
-from AgentForge.database.db import with_session
+from AgentForge.core.tool_cache import tool_result_cache
+from AgentForge.database.db import db, with_async_session
 from AgentForge.database.models import Reminder
+from AgentForge.database.search import search_reminders
 
 logger = logging.getLogger(__name__)
 
+# Page sizes of list_reminders
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CURSOR_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Lifetime of memoized reminder reads in seconds; writes and deliveries invalidate them in this
+# process only, so writes of other workers are seen after at most this long
+READ_CACHE_TTL = 30
+READ_TOOLS = ["get_all_reminders", "list_reminders", "search_reminders"]
+
 WHO_AM_I = """You are a reminder management assistant. Always respond in User language!
 Current system time: {current_time}
 
@@ -27,13 +45,14 @@ For creating a reminder:
 4. Use create_reminder tool with extracted data
 
 For deleting a reminder:
-1. First use get_all_reminders to get list of all reminders
-2. Find reminder whose text best matches user request
+1. First use search_reminders with key words from user request
+2. Find reminder whose text best matches user request (if nothing is found, use list_reminders)
 3. Use delete_reminder with ID of found reminder
 
 For viewing reminders:
-1. Use get_all_reminders
-2. Format reminder list for easy reading
+1. Use list_reminders, with from_time/to_time if user asks about a period
+2. If next_cursor is returned and more reminders are needed, call list_reminders again with this cursor
+3. Format reminder list for easy reading
 
 Always confirm operation result to user."""
 
@@ -42,6 +61,7 @@ Always confirm operation result to user."""
 class CreateReminderTool(BaseTool):
     name = "create_reminder"
     description = "Creates a new reminder"
+    invalidates = READ_TOOLS
     parameters = [
         ToolParameter(
             name="text",
@@ -56,11 +76,17 @@ class CreateReminderTool(BaseTool):
     ]
     returns = "Result of action"
     
-    @with_session
-    async def execute(self, text: str, date_time_str: str, session: Session) -> Dict:
-        reminder_id = f"rem_{uuid.uuid4().hex[:8]}"
-        agent_id = self.parent_agent.get_id()
+    async def execute(self, text: str, date_time_str: str) -> Dict:
         reminder_time = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M")
+        result = await self._create(text, reminder_time)
+        # Notify after commit, so the scheduler always finds the row
+        ReminderChecker.notify_created(result["id"], reminder_time)
+        return result
+
+    @with_async_session
+    async def _create(self, text: str, reminder_time: datetime, session: AsyncSession) -> Dict:
+        reminder_id = f"rem_{uuid.uuid4().hex[:8]}"
+        agent_id = self.get_parent_agent().get_id()
         
         reminder = Reminder(
             id=reminder_id,
@@ -80,6 +106,7 @@ class CreateReminderTool(BaseTool):
 class DeleteReminderTool(BaseTool):
     name = "delete_reminder"
     description = "Deletes a reminder by its ID"
+    invalidates = READ_TOOLS
     parameters = [
         ToolParameter(
             name="reminder_id",
@@ -89,13 +116,19 @@ class DeleteReminderTool(BaseTool):
     ]
     returns = "Result of action"
     
-    @with_session
-    async def execute(self, reminder_id: str, session: Session) -> Dict:
-        agent_id = self.parent_agent.get_id()
+    async def execute(self, reminder_id: str) -> Dict:
+        result = await self._delete(reminder_id)
+        if result["success"]:
+            ReminderChecker.notify_deleted(reminder_id)
+        return result
+
+    @with_async_session
+    async def _delete(self, reminder_id: str, session: AsyncSession) -> Dict:
+        agent_id = self.get_parent_agent().get_id()
         logger.info(f"Deleting reminder with ID: {reminder_id}")
-        reminder = session.query(Reminder).filter_by(id=reminder_id, agent_id=agent_id).first()
+        reminder = await session.scalar(select(Reminder).filter_by(id=reminder_id, agent_id=agent_id))
         if reminder:
-            session.delete(reminder)
+            await session.delete(reminder)
             return {
                 "success": True, 
                 "message": f"Reminder '{reminder.text}' deleted"
@@ -108,13 +141,126 @@ class DeleteReminderTool(BaseTool):
 class GetAllRemindersTool(BaseTool):
     name = "get_all_reminders"
     description = "Returns all existing reminders"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
     parameters = []
     returns = "List of reminders"
     
-    @with_session
-    async def execute(self, session: Session) -> List[Dict]:
+    @with_async_session
+    async def execute(self, session: AsyncSession) -> List[Dict]:
         logger.info("Getting all reminders")
-        reminders = session.query(Reminder).all()
+        agent_id = self.get_parent_agent().get_id()
+        reminders = (await session.scalars(Reminder.agent_reminders_query(agent_id))).all()
+        return [{
+            "id": r.id,
+            "text": r.text,
+            "datetime": r.reminder_time.strftime("%Y-%m-%d %H:%M")
+        } for r in reminders]
+
+class ListRemindersTool(BaseTool):
+    name = "list_reminders"
+    description = "Returns one page of reminders ordered by time, optionally within a time range"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
+    parameters = [
+        ToolParameter(
+            name="from_time",
+            type="string",
+            description="Start of the range in format YYYY-MM-DD HH:MM",
+            required=False
+        ),
+        ToolParameter(
+            name="to_time",
+            type="string",
+            description="End of the range in format YYYY-MM-DD HH:MM",
+            required=False
+        ),
+        ToolParameter(
+            name="limit",
+            type="integer",
+            description=f"Max number of reminders in the page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+            required=False
+        ),
+        ToolParameter(
+            name="cursor",
+            type="string",
+            description="next_cursor from the previous page",
+            required=False
+        )
+    ]
+    returns = "{reminders: [{id, text, datetime}], next_cursor}"
+
+    @with_async_session
+    async def execute(
+        self,
+        from_time: Optional[str] = None,
+        to_time: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        session: AsyncSession = None
+    ) -> Dict:
+        agent_id = self.get_parent_agent().get_id()
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+            start = datetime.strptime(from_time, "%Y-%m-%d %H:%M") if from_time else None
+            end = datetime.strptime(to_time, "%Y-%m-%d %H:%M") if to_time else None
+            after = None
+            if cursor:
+                after_time, after_id = cursor.split("|", 1)
+                after = (datetime.strptime(after_time, CURSOR_TIME_FORMAT), after_id)
+        except (TypeError, ValueError) as e:
+            return {"success": False, "message": f"Invalid limit, time range or cursor: {e}"}
+
+        # Fetch one extra row to know whether there is a next page
+        reminders = (await session.scalars(
+            Reminder.agent_reminders_query(agent_id, start=start, end=end, after=after, limit=limit + 1)
+        )).all()
+        has_more = len(reminders) > limit
+        reminders = reminders[:limit]
+        logger.info(f"Reminders page retrieved: {len(reminders)}")
+
+        next_cursor = None
+        if has_more:
+            last = reminders[-1]
+            next_cursor = f"{last.reminder_time.strftime(CURSOR_TIME_FORMAT)}|{last.id}"
+        return {
+            "reminders": [{
+                "id": r.id,
+                "text": r.text,
+                "datetime": r.reminder_time.strftime("%Y-%m-%d %H:%M")
+            } for r in reminders],
+            "next_cursor": next_cursor
+        }
+
+class SearchRemindersTool(BaseTool):
+    name = "search_reminders"
+    description = "Finds reminders whose text best matches the query"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
+    parameters = [
+        ToolParameter(
+            name="query",
+            type="string",
+            description="Key words to search for"
+        ),
+        ToolParameter(
+            name="limit",
+            type="integer",
+            description="Max number of reminders to return (default 5)",
+            required=False
+        )
+    ]
+    returns = "List of best matching reminders, best first"
+
+    @with_async_session
+    async def execute(self, query: str, limit: int = 5, session: AsyncSession = None) -> Union[List[Dict], Dict]:
+        agent_id = self.get_parent_agent().get_id()
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError) as e:
+            return {"success": False, "message": f"Invalid limit: {e}"}
+        reminders = await search_reminders(session, agent_id, query, limit)
+        logger.info(f"Reminders found for '{query}': {len(reminders)}")
         return [{
             "id": r.id,
             "text": r.text,
@@ -143,7 +289,9 @@ class ReminderAgentTool(BaseTool):
             tools=[
                 CreateReminderTool(), 
                 DeleteReminderTool(), 
-                GetAllRemindersTool()
+                GetAllRemindersTool(),
+                ListRemindersTool(),
+                SearchRemindersTool()
             ]
         )
 
@@ -153,37 +301,112 @@ class ReminderAgentTool(BaseTool):
         return WHO_AM_I.format(current_time=current_time)
     
     async def execute(self, request: str) -> str:
-        # Update system prompt with current time before each execution
-        self.agent.clear_messages()
-        self.agent.update_who_am_i(self._get_system_prompt())
+        # Each call runs in its own sub-agent with the current time in the system prompt
+        parent = self.get_parent_agent()
+        agent = self.agent.spawn(agent_id=parent.get_id(), client=parent.client, who_am_i=self._get_system_prompt())
         logger.info(f"Running agent with request: {request}")
-        res = await self.agent.run(request)
+        res = await agent.run(request)
         return res
 
 
 
 class ReminderChecker:
-    def __init__(self, callback: Callable, check_interval: int = 60):
+    """
+    Delivers due reminders to a callback.
+
+    Upcoming reminder times are kept in a min-heap and the checker sleeps
+    exactly until the next one. Reminder tools notify running checkers about
+    changes, while the database stays the source of truth.
+
+    Several checkers (e.g. in different processes) may share one database:
+    each one atomically leases a batch of due rows before delivering them and
+    deletes only the rows it has leased. Rows whose lease expired, because
+    delivery failed or the worker died, are delivered again.
+    """
+
+    # Running checkers of this process, notified by the reminder tools
+    _instances: "weakref.WeakSet[ReminderChecker]" = weakref.WeakSet()
+
+    # Max number of ids in one IN (...) clause
+    ID_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        callback: Callable,
+        check_interval: int = 60,
+        worker_id: str = None,
+        lease_seconds: int = 60,
+        batch_size: int = 100,
+        max_concurrency: int = 10,
+    ):
         """
         Initialize reminder checker
         Args:
-            check_interval: interval in seconds to check for due reminders
+            callback: coroutine called with every due reminder
+            check_interval: max sleep in seconds; reminders written by other
+                processes are picked up within this interval
+            worker_id: unique name of this checker, stored in leased rows
+            lease_seconds: how long a leased reminder is reserved for this worker
+            batch_size: max number of reminders leased at once
+            max_concurrency: max number of callbacks running at the same time
         """
         logger.info(f"Reminder checker initialized with interval {check_interval} seconds")
         self.check_interval = check_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
         self._running = False
         self._task = None
         self.callback = callback
 
+        self._heap: List[Tuple[datetime, str]] = []
+        self._scheduled: Dict[str, datetime] = {}
+        self._wakeup = asyncio.Event()
+
+    @classmethod
+    def notify_created(cls, reminder_id: str, reminder_time: datetime) -> None:
+        """Schedules a new reminder in all running checkers."""
+        for checker in list(cls._instances):
+            checker.schedule(reminder_id, reminder_time)
+
+    @classmethod
+    def notify_deleted(cls, reminder_id: str) -> None:
+        """Removes a reminder from all running checkers."""
+        for checker in list(cls._instances):
+            checker.unschedule(reminder_id)
+
+    def schedule(self, reminder_id: str, reminder_time: datetime) -> None:
+        """Adds or moves a reminder in the schedule."""
+        self._scheduled[reminder_id] = reminder_time
+        heapq.heappush(self._heap, (reminder_time, reminder_id))
+        if self._heap[0] == (reminder_time, reminder_id):
+            self._wakeup.set()
+
+    def unschedule(self, reminder_id: str) -> None:
+        """Removes a reminder from the schedule, its heap entry is dropped lazily."""
+        self._scheduled.pop(reminder_id, None)
+
+    def _next_time(self) -> Optional[datetime]:
+        """Returns the time of the next scheduled reminder, skipping stale heap entries."""
+        while self._heap:
+            reminder_time, reminder_id = self._heap[0]
+            if self._scheduled.get(reminder_id) == reminder_time:
+                return reminder_time
+            heapq.heappop(self._heap)
+        return None
+
     async def start(self):
         """Start checking reminders"""
         self._running = True
+        ReminderChecker._instances.add(self)
         self._task = asyncio.create_task(self._check_reminders())
         logger.info("Reminder checker started")
 
     async def stop(self):
         """Stop checking reminders"""
         self._running = False
+        ReminderChecker._instances.discard(self)
         if self._task:
             self._task.cancel()
             try:
@@ -192,19 +415,147 @@ class ReminderChecker:
                 pass
         logger.info("Reminder checker stopped")
 
-    @with_session
-    async def _check_reminders(self, session: Session):
+    async def _sync_schedule(self, horizon: Optional[timedelta] = None):
+        """Loads reminders from the database; with horizon only the ones due before now + horizon."""
+        query = select(Reminder.id, Reminder.reminder_time)
+        if horizon is not None:
+            query = query.where(Reminder.reminder_time <= datetime.now() + horizon)
+        async with db.get_async_session() as session:
+            rows = (await session.execute(query)).all()
+
+        if horizon is None:
+            self._scheduled = {reminder_id: reminder_time for reminder_id, reminder_time in rows}
+            self._heap = [(reminder_time, reminder_id) for reminder_id, reminder_time in rows]
+            heapq.heapify(self._heap)
+            logger.info(f"Reminder schedule loaded: {len(rows)} reminders")
+            return
+
+        for reminder_id, reminder_time in rows:
+            if self._scheduled.get(reminder_id) != reminder_time:
+                self.schedule(reminder_id, reminder_time)
+
+    async def _check_reminders(self):
         """Main loop for checking reminders"""
+        last_sync = None
         while self._running:
-            # logger.debug("Checking reminders")
             try:
-                due_reminders = Reminder.get_due_reminders(session)
-                for reminder in due_reminders:
-                    logger.info(f"Reminder found: {reminder.text} at {reminder.reminder_time}")
-                    await self.callback(reminder)
-                    session.delete(reminder)
-                    session.commit()
-                await asyncio.sleep(self.check_interval)
+                if last_sync is None:
+                    await self._sync_schedule()
+                    last_sync = time.monotonic()
+                elif time.monotonic() - last_sync >= self.check_interval:
+                    await self._sync_schedule(horizon=timedelta(seconds=self.check_interval))
+                    last_sync = time.monotonic()
+
+                await self._dispatch_due()
+
+                timeout = self.check_interval
+                next_time = self._next_time()
+                if next_time is not None:
+                    timeout = min(timeout, max(0.0, (next_time - datetime.now()).total_seconds()))
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
             except Exception as e:
                 logger.error(f"Error checking reminders: {e}")
-                await asyncio.sleep(self.check_interval)
\ No newline at end of file
+                await asyncio.sleep(self.check_interval)
+
+    async def _dispatch_due(self):
+        """Leases and delivers due reminders, batch by batch."""
+        now = datetime.now()
+        due_ids = []
+        while (next_time := self._next_time()) is not None and next_time <= now:
+            _, reminder_id = heapq.heappop(self._heap)
+            del self._scheduled[reminder_id]
+            due_ids.append(reminder_id)
+
+        if not due_ids:
+            return
+
+        claimed_ids = set()
+        while True:
+            reminders, lease_until = await self._claim_batch()
+            for reminder in reminders:
+                claimed_ids.add(reminder.id)
+                self.unschedule(reminder.id)
+            if reminders:
+                await self._deliver(reminders, lease_until)
+            if len(reminders) < self.batch_size:
+                break
+
+        unclaimed = [reminder_id for reminder_id in due_ids if reminder_id not in claimed_ids]
+        if unclaimed:
+            await self._reschedule_unclaimed(unclaimed)
+
+    async def _claim_batch(self) -> Tuple[List[Reminder], datetime]:
+        """Leases a batch of due reminders for this worker."""
+        now = datetime.now()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        async with db.get_async_session() as session:
+            await session.execute(Reminder.claim_due_query(self.worker_id, now, lease_until, self.batch_size))
+            await session.commit()
+            reminders = (await session.scalars(
+                select(Reminder).where(
+                    Reminder.claimed_by == self.worker_id,
+                    Reminder.lease_until == lease_until
+                )
+            )).all()
+        return reminders, lease_until
+
+    async def _deliver(self, reminders: List[Reminder], lease_until: datetime):
+        """Runs callbacks concurrently and deletes the delivered reminders."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def deliver(reminder: Reminder) -> bool:
+            async with semaphore:
+                logger.info(f"Reminder found: {reminder.text} at {reminder.reminder_time}")
+                try:
+                    await self.callback(reminder)
+                    return True
+                except Exception as e:
+                    logger.error(f"Error delivering reminder {reminder.id}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(deliver(reminder) for reminder in reminders))
+
+        delivered = []
+        for reminder, success in zip(reminders, results):
+            if success:
+                delivered.append(reminder.id)
+            else:
+                # Delivered again once the lease expires
+                self.schedule(reminder.id, lease_until)
+
+        for start in range(0, len(delivered), self.ID_BATCH_SIZE):
+            async with db.get_async_session() as session:
+                await session.execute(
+                    delete(Reminder)
+                    .where(
+                        Reminder.id.in_(delivered[start:start + self.ID_BATCH_SIZE]),
+                        Reminder.claimed_by == self.worker_id,
+                        Reminder.lease_until == lease_until
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+
+        for agent_id in {reminder.agent_id for reminder in reminders if reminder.id in delivered}:
+            for tool_name in READ_TOOLS:
+                tool_result_cache.invalidate(tool_name, agent_id)
+
+    async def _reschedule_unclaimed(self, reminder_ids: List[str]):
+        """Reschedules due reminders leased by other workers until their lease expires."""
+        now = datetime.now()
+        for start in range(0, len(reminder_ids), self.ID_BATCH_SIZE):
+            async with db.get_async_session() as session:
+                rows = (await session.execute(
+                    select(Reminder.id, Reminder.reminder_time, Reminder.lease_until)
+                    .where(Reminder.id.in_(reminder_ids[start:start + self.ID_BATCH_SIZE]))
+                )).all()
+            # Deleted rows are not returned and simply drop out of the schedule
+            for reminder_id, reminder_time, lease_until in rows:
+                retry_at = max(reminder_time, lease_until or reminder_time)
+                if retry_at <= now:
+                    retry_at = now + timedelta(seconds=1)
+                self.schedule(reminder_id, retry_at)
@@ -1,44 +1,124 @@
 # Standard library imports
+import asyncio
 import logging
-from typing import Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional
 from datetime import datetime
 
 # Third party imports
-from bs4 import BeautifulSoup
-import aiohttp
 from duckduckgo_search import DDGS
 
 # Local imports
 from AgentForge.core.tool_base import BaseTool, ToolParameter
-from AgentForge.core.agent import Agent
+from AgentForge.core.agent import MAX_ITERATIONS_ANSWER, Agent
+from AgentForge.core.client import Priority, request_context
 from AgentForge.core.message_storage import MessageStorage
+from AgentForge.tools.html_extract import MAX_PAGE_BYTES, extract_response_text
+from AgentForge.tools.http_session import http_sessions
+from AgentForge.tools.parse_executor import ParseExecutor, parse_executor
+from AgentForge.tools.prefetch import PagePrefetcher
 
 logger = logging.getLogger(__name__)
 
+# Answer of the search agent when nothing was found
+NOTHING_FOUND = "Nothing useful found"
+
 WHO_AM_I = """You are an internet search assistant. Current time: {time}
 
 For searching:
 1. Search the internet using search_internet tool to find relevant pages
-2. For each promising search result, use get_page_content tool to retrieve and analyze the actual content
+2. Retrieve and analyze the actual content of all promising search results at once with get_pages_content tool
+   (use get_page_content tool for a single page)
 3. Combine and analyze information from multiple sources to provide a comprehensive answer
 
 Important:
-- Always check page content with get_page_content tool
+- Always check page content with get_pages_content or get_page_content tool
 - Provide sources and quote relevant parts from the retrieved content
 - If the content is not relevant, try another search result
+- Pass several reformulations of the request as queries of one search_internet call, they are searched concurrently
 - Try to ask in another way (reinvoke search_internet tool) if you can't find what you need
-- If in the end nothing useful is found, return "Nothing useful found"
+- If in the end nothing useful is found, return "{nothing_found}"
 
 Always provide sources of information in your response."""
 
+SUMMARIZE_PROMPT = "Summarize the following text short and concise:\n{text}"
+# Max number of pages fetched by one get_pages_content call
+MAX_PAGES_PER_CALL = 8
+# Max number of characters of page text
+DEFAULT_MAX_CHARS = 10000
+# Texts up to this size are summarized in one request; a page of DEFAULT_MAX_CHARS always is
+SUMMARY_CHUNK_CHARS = 2 * DEFAULT_MAX_CHARS
+
+REDUCE_PROMPT = "Combine the following summaries of parts of one page into one short and concise summary:\n{summaries}"
+
+# DDGS is synchronous: searches run in these threads, each reusing its own DDGS instance
+SEARCH_WORKERS = 4
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+_search_local = threading.local()
+
+
+def _get_ddgs() -> DDGS:
+    ddgs = getattr(_search_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = _search_local.ddgs = DDGS()
+    return ddgs
+
+
+def _search(query: str, max_results: int) -> List[Dict]:
+    """Runs one search, blocking; called in the search threads."""
+    ddgs = _get_ddgs()
+    # Try using the regular search first
+    try:
+        results = list(ddgs.text(query, max_results=max_results))
+    except Exception as e:
+        logger.warning(f"Regular search failed, trying alternative method: {e}")
+        # Try alternative search method
+        results = list(ddgs.news(query, max_results=max_results))
+
+    return [{
+        "title": result.get("title", "No title"),
+        "url": result.get("href") or result.get("url", ""),
+        "description": result.get("body", "No description")
+    } for result in results]
+
+
+def _merge_results(result_lists: List[List[Dict]]) -> List[Dict]:
+    """Interleaves results of several queries by rank, dropping repeated URLs."""
+    merged = []
+    seen = set()
+    for rank in range(max((len(results) for results in result_lists), default=0)):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            url = result["url"].rstrip("/")
+            if url in seen:
+                continue
+            seen.add(url)
+            merged.append(result)
+    return merged
+
+
+class PageFetchError(Exception):
+    """Raised when a page cannot be downloaded."""
+
+
 class SearchInternetTool(BaseTool):
     name = "search_internet"
-    description = "Internet search tool" 
+    description = "Internet search tool"
+    order_sensitive = False
     parameters = [
         ToolParameter(
             name="query",
             type="string",
             description="Search query"
+        ),
+        ToolParameter(
+            name="queries",
+            type="array",
+            description="Several search queries (e.g. reformulations), searched concurrently; results are merged",
+            required=False
         )
     ]
     returns = """[{
@@ -46,35 +126,63 @@ class SearchInternetTool(BaseTool):
 "url",
 "description"}]"""
 
-    async def execute(self, query: str, max_results: int = 4) -> List[Dict]:
-        logger.info(f"Searching internet for: {query}")
-        try:
-            # Create new DDGS instance with timeout and retries
-            with DDGS() as ddgs:
-                # Try using the regular search first
-                try:
-                    results = list(ddgs.text(query, max_results=max_results))
-                except Exception as e:
-                    logger.warning(f"Regular search failed, trying alternative method: {e}")
-                    # Try alternative search method
-                    results = list(ddgs.news(query, max_results=max_results))
-
-                if not results:
-                    logger.warning("No results found")
-                    return []
-
-                return [{
-                    "title": result.get("title", "No title"),
-                    "url": result.get("href", ""),
-                    "description": result.get("body", "No description")
-                } for result in results]
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            return []
+    def __init__(self, prefetcher: Optional[PagePrefetcher] = None):
+        """
+        Args:
+            prefetcher: starts downloading the top results right away
+        """
+        self.prefetcher = prefetcher
+
+    async def execute(self, query: str = None, queries: Optional[List[str]] = None, max_results: int = 4) -> List[Dict]:
+        if isinstance(queries, str):
+            queries = [queries]
+        # Unique queries, in order
+        all_queries = list(dict.fromkeys(q for q in [query, *(queries or [])] if q))
+        logger.info(f"Searching internet for: {all_queries}")
+
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(_search_executor, _search, q, max_results) for q in all_queries
+        ), return_exceptions=True)
+
+        result_lists = []
+        for q, outcome in zip(all_queries, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Search error for '{q}': {outcome}")
+            else:
+                result_lists.append(outcome)
+
+        results = _merge_results(result_lists)
+        if not results:
+            logger.warning("No results found")
+        elif self.prefetcher is not None:
+            self.prefetcher.prefetch(result["url"] for result in results)
+        return results
+
+def _split_text(text: str, chunk_chars: int) -> List[str]:
+    """Splits text into chunks of at most about chunk_chars, at paragraph boundaries where possible."""
+    chunks = []
+    current = []
+    size = 0
+    for paragraph in text.split("\n"):
+        # Paragraphs longer than a chunk are cut
+        for start in range(0, max(len(paragraph), 1), chunk_chars):
+            piece = paragraph[start:start + chunk_chars]
+            if current and size + len(piece) > chunk_chars:
+                chunks.append("\n".join(current))
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
 
 class GetPageContentTool(BaseTool):
     name = "get_page_content"
     description = "Extracts clean text content from a webpage"
+    order_sensitive = False
     parameters = [
         ToolParameter(
             name="url",
@@ -84,67 +192,123 @@ class GetPageContentTool(BaseTool):
     ]
     returns = "Cleaned text content from the webpage"
 
-    def __init__(self, ai_summarize: bool = True):
+    def __init__(
+        self,
+        ai_summarize: bool = True,
+        max_bytes: int = MAX_PAGE_BYTES,
+        executor: ParseExecutor = None,
+        summary_chunk_chars: int = SUMMARY_CHUNK_CHARS,
+        max_parallel_summaries: int = 4,
+        prefetcher: Optional[PagePrefetcher] = None
+    ):
+        """
+        Args:
+            ai_summarize: summarize page text with the agent's LLM
+            max_bytes: max number of bytes of a page that are downloaded
+            executor: executor that parses pages, defaults to the shared parse_executor
+            summary_chunk_chars: texts up to this size are summarized in one request; longer ones
+                in chunks of this size, then the summaries are combined
+            max_parallel_summaries: max number of summarization requests of one call running at once
+            prefetcher: downloads started by the search tool, used instead of new ones
+        """
         self.ai_summarize = ai_summarize
+        self.max_bytes = max_bytes
+        self.executor = executor or parse_executor
+        self.summary_chunk_chars = summary_chunk_chars
+        self.max_parallel_summaries = max_parallel_summaries
+        self.prefetcher = prefetcher
+
+    async def execute(self, url: str, max_chars: int = DEFAULT_MAX_CHARS) -> Dict:
+        return await self.get_page(url, max_chars, asyncio.Semaphore(self.max_parallel_summaries))
+
+    async def summarize(self, text: str, semaphore: asyncio.Semaphore) -> str:
+        """Summarizes text chunks in parallel and combines the chunk summaries into one."""
+        logger.info(f"Summarizing text with AI")
+
+        async def generate(prompt: str) -> str:
+            async with semaphore:
+                return await self.get_parent_agent().client.generate_message([{"role": "user", "content": prompt}])
+
+        with request_context(priority=Priority.BACKGROUND):
+            if len(text) <= self.summary_chunk_chars:
+                return await generate(SUMMARIZE_PROMPT.format(text=text))
+            chunks = _split_text(text, self.summary_chunk_chars)
+            summaries = await asyncio.gather(*(generate(SUMMARIZE_PROMPT.format(text=chunk)) for chunk in chunks))
+            if len(summaries) == 1:
+                return summaries[0]
+            return await generate(REDUCE_PROMPT.format(summaries="\n\n".join(summaries)))
 
-    async def execute(self, url: str, max_chars: int = 10000) -> Dict:
+    async def download_text(self, url: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+        """Downloads a page and extracts its text."""
+        async with http_sessions.get().get(url, allow_redirects=True) as response:
+            if response.status != 200:
+                raise PageFetchError(f"HTTP {response.status}")
+            return await extract_response_text(response, max_chars, self.max_bytes, self.executor)
+
+    async def fetch_text(self, url: str, max_chars: int) -> str:
+        """Returns page text, from a prefetched download when there is one."""
+        task = self.prefetcher.take(url) if self.prefetcher is not None and max_chars <= DEFAULT_MAX_CHARS else None
+        if task is not None:
+            logger.info(f"Using prefetched page: {url}")
+            try:
+                # Shielded: the download is shared with later calls for the same page
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # Only a cancelled prefetch is replaced, a cancelled call stops here
+                if not task.cancelled():
+                    raise
+                logger.info(f"Prefetch of {url} was cancelled, downloading again")
+            except Exception as e:
+                logger.info(f"Prefetch of {url} failed, downloading again: {e}")
+        return await self.download_text(url, max_chars)
+
+    async def get_page(self, url: str, max_chars: int, semaphore: asyncio.Semaphore) -> Dict:
+        """Fetches a page and returns its (summarized) text; summarization requests share the semaphore."""
         logger.info(f"Getting page content from: {url}")
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            text = await self.fetch_text(url, max_chars)
+
+            # Truncate to max_chars
+            if len(text) > max_chars:
+                text = text[:max_chars] + "..."
+
+            if len(text) < 20:
+                logger.warning(f"Page content is too short.")
+                return {"success": True, "content": NOTHING_FOUND, "url": url}
+
+            summarized_text = text
+            if self.ai_summarize:
+                summarized_text = await self.summarize(text, semaphore)
+
+            return {
+                "success": True,
+                "url": url,
+                "content": summarized_text,
+                "length": len(summarized_text)
             }
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.get(url, allow_redirects=True, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(f"HTTP {response.status}")
-                        return {"success": False, "error": f"HTTP {response.status}"}
-                    
-                    html = await response.text()
-                    
-                    # Parse HTML and clean content
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Remove more unwanted elements
-                    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'form', 'noscript', 'meta', 'link']):
-                        element.decompose()
-                    
-                    # Remove elements with specific classes/ids that often contain ads or irrelevant content
-                    for element in soup.find_all(class_=lambda x: x and any(word in str(x).lower() for word in ['ad', 'banner', 'popup', 'modal', 'cookie'])):
-                        element.decompose()
-                    
-                    # Get clean text with better formatting
-                    paragraphs = []
-                    for p in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                        text = p.get_text().strip()
-                        if text:
-                            paragraphs.append(text)
-                    
-                    text = '\n'.join(paragraphs)
-                    
-                    # Truncate to max_chars
-                    if len(text) > max_chars:
-                        text = text[:max_chars] + "..."
-
-                    if len(text) < 20:
-                        logger.warning(f"Page content is too short.")
-                        return {"success": True, "content": "Nothing useful found", "url": url}
-
-                    summarized_text = text
-                    if self.ai_summarize:
-                        logger.info(f"Summarizing text with AI")
-                        summarized_text = await self.parent_agent.client.generate_message([
-                            {"role": "user", "content": f"Summarize the following text short and concise:\n{text}"}
-                        ])
-                    
-                    return {
-                        "success": True,
-                        "url": url,
-                        "content": summarized_text,
-                        "length": len(summarized_text)
-                    }
         except Exception as e:
             logger.error(f"Error fetching page {url}: {e}")
-            return {"success": False, "error": str(e)}
+            return {"success": False, "url": url, "error": str(e)}
+
+class GetPagesContentTool(GetPageContentTool):
+    name = "get_pages_content"
+    description = "Fetches several webpages concurrently and extracts clean text content from each"
+    parameters = [
+        ToolParameter(
+            name="urls",
+            type="array",
+            description=f"URLs of the webpages (at most {MAX_PAGES_PER_CALL})"
+        )
+    ]
+    returns = "[{url, success, content}] in the order of urls"
+
+    async def execute(self, urls: List[str], max_chars: int = DEFAULT_MAX_CHARS) -> List[Dict]:
+        if isinstance(urls, str):
+            urls = [urls]
+        urls = list(dict.fromkeys(urls))[:MAX_PAGES_PER_CALL]
+        # One limit for all summarization requests of the call
+        semaphore = asyncio.Semaphore(self.max_parallel_summaries)
+        return list(await asyncio.gather(*(self.get_page(url, max_chars, semaphore) for url in urls)))
 
 class SearchAgentTool(BaseTool):
     name = "search_agent"
@@ -157,26 +321,62 @@ class SearchAgentTool(BaseTool):
         )
     ]
     returns = "Search results and analysis"
+    # Every call runs in its own sub-agent and only reads the web
+    order_sensitive = False
+    # Repeated requests are answered without running the search agent again
+    cache_ttl = 600
+
+    def __init__(self, prefetch: bool = False, prefetch_top_k: int = 3):
+        """
+        Args:
+            prefetch: start downloading the top search results before the agent asks for them
+            prefetch_top_k: number of top results of each search that are prefetched
+        """
+        self.prefetch = prefetch
+        self.prefetch_top_k = prefetch_top_k
+
+    def is_cacheable(self, result: Any) -> bool:
+        # Runs that gave up are retried rather than repeated for the whole TTL
+        if not isinstance(result, str):
+            return super().is_cacheable(result)
+        answer = result.strip().rstrip(".")
+        return answer not in (MAX_ITERATIONS_ANSWER, NOTHING_FOUND) and not answer.startswith("Error:")
+
+    def cache_key(self, **kwargs) -> Hashable:
+        # Requests differing only in case and whitespace share a result
+        return super().cache_key(**{
+            name: " ".join(value.lower().split()) if isinstance(value, str) else value
+            for name, value in kwargs.items()
+        })
 
     def get_who_am_i(self):
-        return WHO_AM_I.format(time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        return WHO_AM_I.format(time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), nothing_found=NOTHING_FOUND)
 
     def on_register(self, parent_agent: Agent):
         client = parent_agent.client
+        page_tool = GetPageContentTool()
+        pages_tool = GetPagesContentTool()
+        prefetcher = None
+        if self.prefetch:
+            # Shared by the search and page tools of the sub-agent
+            prefetcher = PagePrefetcher(page_tool.download_text, top_k=self.prefetch_top_k)
+            page_tool.prefetcher = pages_tool.prefetcher = prefetcher
         self.agent = Agent(
             client=client,
             agent_id=parent_agent.get_id(),
             message_storage=MessageStorage(),
             who_am_i=self.get_who_am_i(),
             tools=[
-                SearchInternetTool(), 
-                GetPageContentTool()
+                SearchInternetTool(prefetcher=prefetcher), 
+                page_tool,
+                pages_tool
             ]
         )
 
     async def execute(self, request: str) -> str:
         logger.info(f"Running agent with request: {request}")
-        self.agent.update_who_am_i(self.get_who_am_i())
-        result = await self.agent.run(request) 
-        # logger.info(f"Agent result: { pformat(self.agent.message_storage.get_messages_as_dict())}")
+        parent = self.get_parent_agent()
+        agent = self.agent.spawn(agent_id=parent.get_id(), client=parent.client, who_am_i=self.get_who_am_i())
+        result = await agent.run(request) 
+        # logger.info(f"Agent result: { pformat(agent.message_storage.get_messages_as_dict())}")
         return result
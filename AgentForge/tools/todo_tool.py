@@ -1,20 +1,31 @@
 # Standard library imports
 import logging
 import uuid
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 
 # Third party imports
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Local imports
 from AgentForge.core.tool_base import BaseTool, ToolParameter
 from AgentForge.core.agent import Agent
 from AgentForge.core.message_storage import MessageStorage
-from AgentForge.database.db import with_session
+from AgentForge.database.db import with_async_session
 from AgentForge.database.models import TodoItem
+from AgentForge.database.search import search_todos
 
 logger = logging.getLogger(__name__)
 
+# Page sizes of list_todos
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Lifetime of memoized todo reads in seconds; writes invalidate them in this
+# process only, so writes of other workers are seen after at most this long
+READ_CACHE_TTL = 30
+READ_TOOLS = ["get_all_todos", "list_todos", "search_todos"]
+
 WHO_AM_I = """You are a TODO list management assistant. Always respond in User language!
 
 For creating a todo:
@@ -22,24 +33,26 @@ For creating a todo:
 2. Use create_todo tool with extracted data
 
 For updating a todo:
-1. First use get_all_todos to get list of all todos
-2. Find todo whose title best matches user request
+1. First use search_todos with key words from user request
+2. Find todo whose title best matches user request (if nothing is found, use list_todos)
 3. Use update_todo with ID of found todo and new data
 
 For deleting a todo:
-1. First use get_all_todos to get list of all todos
-2. Find todo whose title best matches user request
+1. First use search_todos with key words from user request
+2. Find todo whose title best matches user request (if nothing is found, use list_todos)
 3. Use delete_todo with ID of found todo
 
 For viewing todos:
-1. Use get_all_todos
-2. Format todo list for easy reading"""
+1. Use list_todos
+2. If next_cursor is returned and more todos are needed, call list_todos again with this cursor
+3. Format todo list for easy reading"""
 
 
 
 class CreateTodoTool(BaseTool):
     name = "create_todo"
     description = "Creates a new todo item"
+    invalidates = READ_TOOLS
     parameters = [
         ToolParameter(
             name="title",
@@ -54,10 +67,10 @@ class CreateTodoTool(BaseTool):
     ]
     returns = "Result of action"
 
-    @with_session
-    async def execute(self, title: str, description: str, session: Session) -> Dict:
+    @with_async_session
+    async def execute(self, title: str, description: str, session: AsyncSession) -> Dict:
         todo_id = f"todo_{uuid.uuid4().hex[:8]}"
-        agent_id = self.parent_agent.get_id()
+        agent_id = self.get_parent_agent().get_id()
         
         todo = TodoItem(
             id=todo_id,
@@ -77,6 +90,7 @@ class CreateTodoTool(BaseTool):
 class UpdateTodoTool(BaseTool):
     name = "update_todo"
     description = "Updates an existing todo item"
+    invalidates = READ_TOOLS
     parameters = [
         ToolParameter(
             name="todo_id",
@@ -96,10 +110,10 @@ class UpdateTodoTool(BaseTool):
     ]
     returns = "Result of action"
     
-    @with_session
-    async def execute(self, todo_id: str, title: str, description: str, session: Session) -> Dict:
-        agent_id = self.parent_agent.get_id()
-        todo = session.query(TodoItem).filter_by(id=todo_id, agent_id=agent_id).first()
+    @with_async_session
+    async def execute(self, todo_id: str, title: str, description: str, session: AsyncSession) -> Dict:
+        agent_id = self.get_parent_agent().get_id()
+        todo = await session.scalar(select(TodoItem).filter_by(id=todo_id, agent_id=agent_id))
         if todo:
             todo.title = title
             todo.description = description
@@ -123,6 +137,7 @@ class UpdateTodoTool(BaseTool):
 class DeleteTodoTool(BaseTool):
     name = "delete_todo"
     description = "Deletes a todo by its ID"
+    invalidates = READ_TOOLS
     parameters = [
         ToolParameter(
             name="todo_id",
@@ -132,13 +147,13 @@ class DeleteTodoTool(BaseTool):
     ]
     returns = "Result of action"
     
-    @with_session
-    async def execute(self, todo_id: str, session: Session) -> Dict:
-        agent_id = self.parent_agent.get_id()
-        todo = session.query(TodoItem).filter_by(id=todo_id, agent_id=agent_id).first()
+    @with_async_session
+    async def execute(self, todo_id: str, session: AsyncSession) -> Dict:
+        agent_id = self.get_parent_agent().get_id()
+        todo = await session.scalar(select(TodoItem).filter_by(id=todo_id, agent_id=agent_id))
         if todo:
             title = todo.title
-            session.delete(todo)
+            await session.delete(todo)
             logger.info(f"Todo deleted: {todo_id} - {title}")
             return {
                 "success": True,
@@ -153,13 +168,15 @@ class DeleteTodoTool(BaseTool):
 class GetAllTodosTool(BaseTool):
     name = "get_all_todos"
     description = "Returns all existing todos"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
     parameters = []
     returns = "List of todos"
     
-    @with_session
-    async def execute(self, session: Session) -> List[Dict]:
-        agent_id = self.parent_agent.get_id()
-        todos = session.query(TodoItem).filter_by(agent_id=agent_id).all()
+    @with_async_session
+    async def execute(self, session: AsyncSession) -> List[Dict]:
+        agent_id = self.get_parent_agent().get_id()
+        todos = (await session.scalars(TodoItem.agent_todos_query(agent_id))).all()
         logger.info(f"Todos retrieved: {len(todos)}")
         return [{
             "id": t.id,
@@ -167,6 +184,83 @@ class GetAllTodosTool(BaseTool):
             "description": t.description
         } for t in todos]
 
+class ListTodosTool(BaseTool):
+    name = "list_todos"
+    description = "Returns one page of todos"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
+    parameters = [
+        ToolParameter(
+            name="limit",
+            type="integer",
+            description=f"Max number of todos in the page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+            required=False
+        ),
+        ToolParameter(
+            name="cursor",
+            type="string",
+            description="next_cursor from the previous page",
+            required=False
+        )
+    ]
+    returns = "{todos: [{id, title, description}], next_cursor}"
+
+    @with_async_session
+    async def execute(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, session: AsyncSession = None) -> Dict:
+        agent_id = self.get_parent_agent().get_id()
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError) as e:
+            return {"success": False, "message": f"Invalid limit: {e}"}
+        # Fetch one extra row to know whether there is a next page
+        todos = (await session.scalars(TodoItem.agent_todos_query(agent_id, after_id=cursor or None, limit=limit + 1))).all()
+        has_more = len(todos) > limit
+        todos = todos[:limit]
+        logger.info(f"Todos page retrieved: {len(todos)}")
+        return {
+            "todos": [{
+                "id": t.id,
+                "title": t.title,
+                "description": t.description
+            } for t in todos],
+            "next_cursor": todos[-1].id if has_more else None
+        }
+
+class SearchTodosTool(BaseTool):
+    name = "search_todos"
+    description = "Finds todos whose title or description best match the query"
+    order_sensitive = False
+    cache_ttl = READ_CACHE_TTL
+    parameters = [
+        ToolParameter(
+            name="query",
+            type="string",
+            description="Key words to search for"
+        ),
+        ToolParameter(
+            name="limit",
+            type="integer",
+            description="Max number of todos to return (default 5)",
+            required=False
+        )
+    ]
+    returns = "List of best matching todos, best first"
+
+    @with_async_session
+    async def execute(self, query: str, limit: int = 5, session: AsyncSession = None) -> Union[List[Dict], Dict]:
+        agent_id = self.get_parent_agent().get_id()
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except (TypeError, ValueError) as e:
+            return {"success": False, "message": f"Invalid limit: {e}"}
+        todos = await search_todos(session, agent_id, query, limit)
+        logger.info(f"Todos found for '{query}': {len(todos)}")
+        return [{
+            "id": t.id,
+            "title": t.title,
+            "description": t.description
+        } for t in todos]
+
 class TodoAgentTool(BaseTool):
     name = "todo_manager"
     parameters = [
@@ -190,9 +284,14 @@ class TodoAgentTool(BaseTool):
                 CreateTodoTool(), 
                 UpdateTodoTool(), 
                 DeleteTodoTool(), 
-                GetAllTodosTool()
+                GetAllTodosTool(),
+                ListTodosTool(),
+                SearchTodosTool()
             ]
         )
     
     async def execute(self, request: str) -> str:
-        return await self.agent.run(request) 
\ No newline at end of file
+        # Each call runs in its own sub-agent, so concurrent calls do not mix their messages
+        parent = self.get_parent_agent()
+        agent = self.agent.spawn(agent_id=parent.get_id(), client=parent.client)
+        return await agent.run(request)
\ No newline at end of file
@@ -6,7 +6,7 @@ from settings import settings
 
 # Import the framework
 from AgentForge import Agent, G4FClient, MessageStorage, db
-from AgentForge.tools import ReminderAgentTool, TodoAgentTool, SearchAgentTool
+from AgentForge.tools import ReminderAgentTool, TodoAgentTool, SearchAgentTool, close_http_sessions, shutdown_parse_executor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,7 +26,8 @@ async def main():
     # Create a message storage
     agent_id = "123"
     message_storage = MessageStorage(max_size=20)
-    # message_storage.load_from_db(unique_id, session)
+    with db.get_session() as session:
+        message_storage.load_from_db(agent_id, session)
     
     # Create an agent
     agent = Agent(
@@ -54,5 +55,15 @@ async def main():
         result = await agent.run(user_input)
         print(f"AI Answer:\n{result}")
 
+        # Persist only the messages of this turn
+        with db.get_session() as session:
+            message_storage.save_to_db(agent_id, session)
+
+    # Close pooled connections and parser workers of the web tools
+    await close_http_sessions()
+    shutdown_parse_executor()
+    # Dispose the database engines; the async one would keep the process alive
+    await db.close()
+
 if __name__ == "__main__":
     asyncio.run(main())
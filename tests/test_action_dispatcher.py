@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from AgentForge.core.agent import Agent, _ActionDispatcher
+from AgentForge.core.client import AIClient
+from AgentForge.core.tool_base import BaseTool
+
+
+class LoggingTool(BaseTool):
+    description = "Records when its calls start and end"
+
+    def __init__(self, log, delays=None):
+        self.log = log
+        # Per call delays by n, 0.02s by default
+        self.delays = delays or {}
+
+    async def execute(self, n, fail=False):
+        self.log.append(("start", n))
+        await asyncio.sleep(self.delays.get(n, 0.02))
+        if fail:
+            self.log.append(("fail", n))
+            raise RuntimeError(f"call {n} failed")
+        self.log.append(("end", n))
+        return n
+
+
+class ReadTool(LoggingTool):
+    name = "read"
+    order_sensitive = False
+
+
+class WriteTool(LoggingTool):
+    name = "write"
+
+
+def make_agent(log, max_parallel_tools=4, read_delays=None):
+    return Agent(
+        "agent",
+        AIClient(),
+        tools=[ReadTool(log, read_delays), WriteTool(log)],
+        max_parallel_tools=max_parallel_tools,
+    )
+
+
+def tool_results(agent):
+    return [message.content for message in agent.message_storage.messages if message.role == "user"]
+
+
+def run(dispatcher, calls):
+    async def main():
+        for call in calls:
+            dispatcher.submit(call)
+        await dispatcher.collect()
+    asyncio.run(main())
+
+
+def test_independent_calls_run_concurrently_and_results_keep_action_order():
+    log = []
+    # Later calls finish first
+    agent = make_agent(log, read_delays={0: 0.05, 1: 0.03, 2: 0.01})
+    calls = [{"read": {"n": n}} for n in range(3)]
+    run(_ActionDispatcher(agent), calls)
+
+    assert log[:3] == [("start", 0), ("start", 1), ("start", 2)]
+    assert [entry for entry in log if entry[0] == "end"] == [("end", 2), ("end", 1), ("end", 0)]
+    assert tool_results(agent) == [f'{{"tool": "read", "result": {n}}}' for n in range(3)]
+
+
+def test_parallel_cap_limits_running_calls():
+    log = []
+    agent = make_agent(log, max_parallel_tools=2)
+    run(_ActionDispatcher(agent), [{"read": {"n": n}} for n in range(4)])
+
+    running = peak = 0
+    for kind, _ in log:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_order_sensitive_call_is_a_barrier():
+    log = []
+    agent = make_agent(log)
+    calls = [{"read": {"n": 0}}, {"read": {"n": 1}}, {"write": {"n": 2}}, {"read": {"n": 3}}, {"read": {"n": 4}}]
+    run(_ActionDispatcher(agent), calls)
+
+    position = {entry: index for index, entry in enumerate(log)}
+    # The write starts after both earlier reads ended
+    assert position[("start", 2)] > max(position[("end", 0)], position[("end", 1)])
+    # Later reads start only after the write ended, and then run together
+    assert min(position[("start", 3)], position[("start", 4)]) > position[("end", 2)]
+    assert position[("start", 4)] < position[("end", 3)]
+    assert tool_results(agent) == [f'{{"tool": "{next(iter(call))}", "result": {n}}}' for n, call in enumerate(calls)]
+
+
+def test_without_parallelism_calls_run_one_by_one():
+    log = []
+    agent = make_agent(log, max_parallel_tools=1)
+    run(_ActionDispatcher(agent), [{"read": {"n": n}} for n in range(3)])
+    assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+
+def test_failed_order_sensitive_call_stops_later_calls():
+    log = []
+    agent = make_agent(log)
+    calls = [{"read": {"n": 0}}, {"write": {"n": 1, "fail": True}}, {"read": {"n": 2}}, {"write": {"n": 3}}]
+    with pytest.raises(RuntimeError, match="call 1 failed"):
+        run(_ActionDispatcher(agent), calls)
+
+    assert ("start", 2) not in log and ("start", 3) not in log
+    # Results before the failure are kept
+    assert tool_results(agent) == ['{"tool": "read", "result": 0}']
+
+
+def test_failure_cancels_concurrent_calls_still_running():
+    log = []
+    agent = make_agent(log, read_delays={0: 0.01, 1: 0.5})
+    calls = [{"read": {"n": 0, "fail": True}}, {"read": {"n": 1}}]
+    with pytest.raises(RuntimeError):
+        run(_ActionDispatcher(agent), calls)
+
+    assert ("start", 1) in log and ("end", 1) not in log
+
+
+def test_unknown_tool_fails_the_turn():
+    agent = make_agent([])
+    with pytest.raises(ValueError, match="not found"):
+        run(_ActionDispatcher(agent), [{"missing": {}}])
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from AgentForge.core.decision_parser import ACTION_EVENT, TEXT_EVENT, DecisionStreamParser
+
+
+def feed_in_chunks(text, size):
+    parser = DecisionStreamParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+def actions_of(events):
+    return [value for kind, value in events if kind == ACTION_EVENT]
+
+
+def answer_of(events):
+    return "".join(value for kind, value in events if kind == TEXT_EVENT)
+
+
+ACTIONS = [
+    {"search": {"query": "a {b} [c]", "nested": {"x": [1, 2]}}},
+    {"todo": {"title": "quote \" and \\ slash"}},
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_actions_are_emitted_once_each_in_order(size):
+    text = json.dumps({"thoughts": "t", "actions": ACTIONS})
+    parser, events = feed_in_chunks(text, size)
+    assert actions_of(events) == ACTIONS
+    assert answer_of(events) == ""
+    assert not parser.is_plain_text
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 1000])
+def test_final_answer_is_decoded_across_split_escapes(size):
+    answer = 'Café "quoted" \\ line\nnext é \U0001F600 end'
+    text = json.dumps({"final_answer": answer})
+    parser, events = feed_in_chunks(text, size)
+    assert answer_of(events) == answer
+    assert actions_of(events) == []
+    assert parser.answer_streamed
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_strings_looking_like_keys_are_not_actions(size):
+    text = json.dumps({"thoughts": '"actions": [{"x": {}}]', "final_answer": "ok"})
+    _, events = feed_in_chunks(text, size)
+    assert actions_of(events) == []
+    assert answer_of(events) == "ok"
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_plain_text_answer_is_streamed_as_is(size):
+    text = "  Just a plain answer {not json}"
+    parser, events = feed_in_chunks(text, size)
+    assert parser.is_plain_text
+    assert answer_of(events) == text
+    assert parser.text == text
+
+
+def test_leading_whitespace_waits_for_first_character():
+    parser = DecisionStreamParser()
+    assert parser.feed("  \n") == []
+    assert parser.feed('{"final_answer": "x"}') == [(TEXT_EVENT, "x")]
@@ -0,0 +1,30 @@
+import pytest
+
+from AgentForge.tools import html_extract
+from AgentForge.tools.html_extract import extract_text
+
+BACKENDS = ["lxml", "stdlib"]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(html_extract, "etree", None)
+    elif html_extract.etree is None:
+        pytest.skip("lxml is not installed")
+    return request.param
+
+
+def test_utf8_without_charset_header_or_meta(backend):
+    html = "<html><body><p>Café crème</p></body></html>".encode("utf-8")
+    assert extract_text(html, max_chars=1000) == "Café crème"
+
+
+def test_meta_charset_without_charset_header(backend):
+    html = '<html><head><meta charset="windows-1251"></head><body><p>Привет</p></body></html>'.encode("windows-1251")
+    assert extract_text(html, max_chars=1000) == "Привет"
+
+
+def test_charset_header_wins_over_default(backend):
+    html = "<html><body><p>Café</p></body></html>".encode("latin-1")
+    assert extract_text(html, max_chars=1000, encoding="latin-1") == "Café"
@@ -0,0 +1,83 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from AgentForge.core.agent import Agent
+from AgentForge.core.client import AIClient
+from AgentForge.core.message_storage import MessageStorage
+from AgentForge.database.db import Base
+from AgentForge.database.models import MessageRecord
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def stored(session, agent_id):
+    rows = session.query(MessageRecord.seq, MessageRecord.content).filter(
+        MessageRecord.agent_id == agent_id
+    ).order_by(MessageRecord.seq)
+    return [tuple(row) for row in rows]
+
+
+def test_save_without_load_continues_stored_history():
+    session = make_session()
+    first = MessageStorage(max_size=None)
+    first.add_message("user", "one")
+    first.add_message("assistant", "two")
+    first.save_to_db("agent", session)
+    session.commit()
+
+    # Not filled by load_from_db, so its numbering starts at 0
+    second = MessageStorage(max_size=None)
+    second.add_message("user", "three")
+    second.save_to_db("agent", session)
+    second.add_message("assistant", "four")
+    second.save_to_db("agent", session)
+    session.commit()
+
+    assert stored(session, "agent") == [(0, "one"), (1, "two"), (2, "three"), (3, "four")]
+
+
+def test_clear_without_load_removes_stored_history():
+    session = make_session()
+    first = MessageStorage(max_size=None)
+    first.add_message("user", "one")
+    first.save_to_db("agent", session)
+    session.commit()
+
+    second = MessageStorage(max_size=None)
+    second.add_message("user", "two")
+    second.clear_messages()
+    second.add_message("user", "three")
+    second.save_to_db("agent", session)
+    session.commit()
+
+    assert stored(session, "agent") == [(2, "three")]
+
+
+def test_agent_keeps_an_empty_storage_passed_to_it():
+    storage = MessageStorage(max_size=None, max_tokens=500)
+    assert len(storage) == 0
+    agent = Agent("agent", AIClient(), message_storage=storage)
+    assert agent.message_storage is storage
+
+
+def test_agent_run_on_empty_loaded_storage_is_saved():
+    session = make_session()
+    storage = MessageStorage(max_size=20)
+    storage.load_from_db("agent", session)
+
+    class Client(AIClient):
+        async def generate_message(self, messages):
+            return '{"final_answer": "hi"}'
+
+    agent = Agent("agent", Client(), message_storage=storage)
+    asyncio.run(agent.run("hello"))
+    storage.save_to_db("agent", session)
+    session.commit()
+
+    assert stored(session, "agent") == [(0, "hello"), (1, '{"final_answer": "hi"}')]